@@ -12,6 +12,8 @@ from datetime import datetime
 from routes.api import api_bp
 from routes.admin import admin_bp
 from database.factory import get_db
+from models.parameter_paths import load_parameter_paths_from_env
+from utils.metrics import init_metrics
 
 def create_app():
     """Application factory pattern"""
@@ -28,6 +30,12 @@ def create_app():
         db = get_db()
         # Database is initialized automatically in the repository constructor
 
+    # Year-varying macro parameters (flat rates are used when PARAMETER_PATHS_FILE is not set)
+    load_parameter_paths_from_env()
+
+    # Request counts, latency and payload size per route, served at /metrics
+    init_metrics(app)
+
     # Register blueprints
     app.register_blueprint(api_bp, url_prefix='/api')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
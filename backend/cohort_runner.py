@@ -0,0 +1,276 @@
+"""
+Offline cohort runner: projects pensions for a whole population file.
+
+The input (CSV or Parquet) is streamed in chunks, every chunk is evaluated with
+PensionCalculator.calculate_pension_batch in a worker process and the results
+are appended to the output file in input order. At most a few chunks are held in
+memory at any time, so the file size does not matter.
+
+Usage:
+    python cohort_runner.py population.csv results.csv --workers 8 --chunk-size 100000 \\
+        --set retirement_age_men=67 --set retirement_age_women=65
+
+With --forecast the workers collapse their chunks into cohorts instead, and the
+output is the yearly pension-liability forecast of the whole population.
+
+Input columns are the calculate_pension_batch columns (age, sex, gross_salary,
+work_start_year and optionally work_end_year, zus_funds, include_sick_leave);
+any other columns (e.g. an id) are copied to the output unchanged.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Add current directory to Python path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import pandas as pd
+
+from models.pension_calculator import PensionCalculator
+from models.parameter_paths import load_parameter_paths_from_env
+
+DEFAULT_CHUNK_SIZE = 100000
+
+# Columns calculate_pension_batch reads; all other input columns are passed through
+CALCULATOR_COLUMNS = frozenset([
+    'age', 'sex', 'gross_salary', 'work_start_year', 'work_end_year', 'zus_funds', 'include_sick_leave'
+])
+
+# Per-process state set up by _init_worker
+_calculator = None
+_parameters = None
+
+
+def _init_worker(parameters):
+    """Create one calculator per worker process"""
+    global _calculator, _parameters
+    load_parameter_paths_from_env()
+    _calculator = PensionCalculator()
+    _parameters = parameters or None
+
+
+def _init_forecast_worker(parameters):
+    """Forecast worker: overrides become calculator attributes (the forecast has no per-row parameters)"""
+    _init_worker(None)
+    for name, value in (parameters or {}).items():
+        setattr(_calculator, name, value)
+
+
+def _run_chunk(chunk):
+    """Evaluate one chunk of the population"""
+    results = _calculator.calculate_pension_batch(chunk, _parameters)
+    extra = [column for column in results.columns if column not in chunk.columns]
+    return pd.concat([chunk, results[extra]], axis=1)
+
+
+def _aggregate_chunk(chunk):
+    """Collapse one chunk of the population into weighted cohorts"""
+    return _calculator.aggregate_cohorts(chunk)
+
+
+def _is_parquet(path):
+    return path.lower().endswith('.parquet')
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError('Parquet files require pyarrow (pip install pyarrow)')
+    return pyarrow
+
+
+def read_chunks(path, chunk_size):
+    """Yield the population file as DataFrames of at most chunk_size rows"""
+    if _is_parquet(path):
+        pyarrow = _import_pyarrow()
+        for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            yield _empty_columns_as_null(chunk)
+
+
+def _empty_columns_as_null(chunk):
+    """
+    Turn passthrough columns without any value in this chunk into None columns
+
+    pandas reads an empty CSV column as float NaN, which would fix a numeric Parquet type
+    for a column that holds text in later chunks; None columns become Arrow nulls instead.
+    """
+    for column in chunk.columns:
+        if column not in CALCULATOR_COLUMNS and chunk[column].dtype == float and chunk[column].isna().all():
+            chunk[column] = pd.Series([None] * len(chunk), index=chunk.index, dtype=object)
+    return chunk
+
+
+class ChunkWriter:
+    """Appends result chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._parquet_writer = None
+
+    def write(self, frame):
+        if _is_parquet(self.path):
+            pyarrow = _import_pyarrow()
+            table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                # A column that is empty (null) in the first chunk is assumed to hold text later
+                schema = pyarrow.schema(
+                    [field.with_type(pyarrow.string()) if pyarrow.types.is_null(field.type) else field
+                     for field in table.schema],
+                    metadata=table.schema.metadata
+                )
+                self._parquet_writer = pyarrow.parquet.ParquetWriter(self.path, schema)
+            # Chunks infer their own dtypes (e.g. int, or float once NaN appears), so every
+            # chunk is cast to the schema fixed by the first one
+            schema = self._parquet_writer.schema
+            self._parquet_writer.write_table(table.select(schema.names).cast(schema))
+        else:
+            frame.to_csv(self.path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0, index=False)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def run_cohort(input_path, output_path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, parameters=None,
+               max_pending=None, progress=None):
+    """
+    Project pensions for every row of input_path and write them to output_path
+
+    Args:
+        input_path: Population CSV or Parquet file
+        output_path: Result CSV or Parquet file (overwritten)
+        workers: Number of worker processes (default: CPU count)
+        chunk_size: Rows per chunk
+        parameters: Optional mapping of calculator parameter -> value for the whole run
+        max_pending: Chunks in flight at once (default: 2 per worker), bounds memory use
+        progress: Optional callback(rows_written)
+
+    Returns:
+        Number of rows written
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    writer = ChunkWriter(output_path)
+    pending = deque()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(parameters,)) as pool:
+            for chunk in read_chunks(input_path, chunk_size):
+                pending.append(pool.submit(_run_chunk, chunk))
+                # Results are written in input order; wait for the oldest chunk when the window is full
+                if len(pending) >= max_pending:
+                    writer.write(pending.popleft().result())
+                    if progress:
+                        progress(writer.rows)
+
+            while pending:
+                writer.write(pending.popleft().result())
+                if progress:
+                    progress(writer.rows)
+    finally:
+        writer.close()
+
+    return writer.rows
+
+
+def forecast_cohort(input_path, output_path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, parameters=None,
+                    first_year=None, last_year=None):
+    """
+    Write the yearly pension-liability forecast of the population in input_path
+
+    Chunks are collapsed into cohorts in the worker processes and merged here, so
+    memory grows with the number of distinct cohorts rather than with the population.
+
+    Returns:
+        The forecast as a DataFrame with one row per year
+    """
+    workers = workers or os.cpu_count() or 1
+    cohorts = None
+    pending = deque()
+
+    def merge(frame):
+        nonlocal cohorts
+        cohorts = frame if cohorts is None else calculator.aggregate_cohorts(pd.concat([cohorts, frame]))
+
+    _init_forecast_worker(parameters)
+    calculator = _calculator
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_forecast_worker, initargs=(parameters,)) as pool:
+        for chunk in read_chunks(input_path, chunk_size):
+            pending.append(pool.submit(_aggregate_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                merge(pending.popleft().result())
+        while pending:
+            merge(pending.popleft().result())
+
+    if cohorts is None:
+        raise ValueError('Empty population file')
+
+    forecast = calculator.forecast_liabilities(cohorts, first_year, last_year)
+    frame = pd.DataFrame({'year': forecast['years']})
+    for name in ['pension_outlay', 'contribution_inflow', 'pensioners', 'contributors']:
+        for group, values in forecast[name].items():
+            frame[f'{name}_{group}'] = values
+    ChunkWriter(output_path).write(frame)
+    return frame
+
+
+def _parse_parameters(assignments):
+    """Turn ['retirement_age_men=67', ...] into a parameter mapping"""
+    parameters = {}
+    calculator = PensionCalculator()
+    for assignment in assignments or []:
+        name, _, value = assignment.partition('=')
+        calculator.check_batch_parameter(name)
+        parameters[name] = float(value)
+    return parameters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Project pensions for a population file')
+    parser.add_argument('input', help='Population CSV or Parquet file')
+    parser.add_argument('output', help='Result CSV or Parquet file')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per chunk')
+    parser.add_argument('--set', action='append', metavar='NAME=VALUE', dest='parameters',
+                        help='Override a calculator parameter, e.g. retirement_age_men=67')
+    parser.add_argument('--forecast', action='store_true', help='Write the yearly pension-liability forecast')
+    parser.add_argument('--first-year', type=int, default=None, help='First forecast year')
+    parser.add_argument('--last-year', type=int, default=None, help='Last forecast year')
+    args = parser.parse_args(argv)
+
+    try:
+        parameters = _parse_parameters(args.parameters)
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.time()
+
+    if args.forecast:
+        forecast = forecast_cohort(args.input, args.output, args.workers, args.chunk_size, parameters,
+                                   args.first_year, args.last_year)
+        print(f'Done: {len(forecast)} forecast years written to {args.output} in {time.time() - started:.1f}s')
+        return
+
+    def report(rows):
+        print(f'{rows} rows written ({rows / max(time.time() - started, 1e-9):.0f} rows/s)', flush=True)
+
+    rows = run_cohort(args.input, args.output, args.workers, args.chunk_size, parameters, progress=report)
+    print(f'Done: {rows} rows written to {args.output} in {time.time() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
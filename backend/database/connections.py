@@ -0,0 +1,134 @@
+"""
+Pool of long-lived SQLite connections
+"""
+
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+# Applied to every new connection. WAL lets readers run while a write is in progress;
+# synchronous=NORMAL is durable against crashes of the process in WAL mode.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,       # KiB (negative) of page cache per connection
+    'mmap_size': 268435456,     # bytes of the file read through mmap
+    'busy_timeout': 5000,       # ms to wait for a lock before "database is locked"
+    'temp_store': 'MEMORY'
+}
+
+
+class SQLiteConnectionPool:
+    """
+    Bounded pool of reusable connections to one database file
+
+    A connection is checked out for one operation and returned afterwards, so the
+    pool works the same for thread-per-request servers and thread pools. Opening
+    connections (and applying pragmas) happens at most max_connections times.
+    """
+
+    def __init__(self, db_path: str, max_connections: int = 8, pragmas: Optional[Dict[str, Any]] = None,
+                 timeout: float = 30.0):
+        """
+        Initialize the pool (connections are opened on demand)
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_connections: Connections open at most; further callers wait for a free one
+            pragmas: Overrides of DEFAULT_PRAGMAS (a value of None skips the pragma)
+            timeout: Seconds to wait for a free connection
+        """
+        self.db_path = db_path
+        # Every connection to :memory: is a separate database
+        self.max_connections = 1 if db_path == ':memory:' else max_connections
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._closed = False
+        self.created = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.journal_mode = None
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, opening one if the pool is not full yet"""
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError('Connection pool is closed')
+            self.checkouts += 1
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._open < self.max_connections:
+                self._open += 1
+                opening = True
+            else:
+                self.waits += 1
+                opening = False
+
+        if not opening:
+            try:
+                return self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise sqlite3.OperationalError('Timed out waiting for a database connection')
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            raise
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a checked-out connection"""
+        with self._lock:
+            if not self._closed:
+                self._idle.put(conn)
+                return
+            self._open -= 1
+        conn.close()
+
+    def close(self):
+        """Close all idle connections; connections still checked out close on release"""
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._open -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, usage counters and the active journal mode"""
+        with self._lock:
+            return {
+                'db_path': self.db_path,
+                'open': self._open,
+                'idle': self._idle.qsize(),
+                'in_use': self._open - self._idle.qsize(),
+                'max_connections': self.max_connections,
+                'created': self.created,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'journal_mode': self.journal_mode,
+                'pragmas': self.pragmas,
+                'closed': self._closed
+            }
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections move between threads, but only one thread uses a connection at a time
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            if value is None:
+                continue
+            row = conn.execute(f'PRAGMA {name} = {value}').fetchone()
+            if name == 'journal_mode' and row is not None:
+                self.journal_mode = row[0]
+        with self._lock:
+            self.created += 1
+        return conn
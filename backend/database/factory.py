@@ -5,6 +5,7 @@ Database factory for creating repository instances
 import os
 from .repository import Repository
 from .sqlite_repository import SQLiteRepository
+from utils.metrics import instrument_methods
 
 
 class DatabaseFactory:
@@ -46,12 +47,16 @@ class DatabaseFactory:
         
         if db_type == 'sqlite':
             db_path = kwargs.get('db_path', os.environ.get('DB_PATH', 'pension_simulator.db'))
-            return SQLiteRepository(db_path=db_path)
+            pool_size = int(kwargs.get('pool_size', os.environ.get('DB_POOL_SIZE', 8)))
+            repository = SQLiteRepository(db_path=db_path, pool_size=pool_size)
         # Add more database types here as needed
         # elif db_type == 'postgres':
-        #     return PostgresRepository(**kwargs)
+        #     repository = PostgresRepository(**kwargs)
         else:
             raise ValueError(f"Unsupported database type: {db_type}")
+
+        # Time every repository operation (db_operation_duration_seconds)
+        return instrument_methods(repository, sorted(Repository.__abstractmethods__))
     
     @classmethod
     def reset(cls):
@@ -4,9 +4,12 @@ This allows for easy swapping of database implementations.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any
 from datetime import datetime
 
+# Rows per executemany call of the bulk operations
+DEFAULT_BULK_CHUNK_SIZE = 5000
+
 
 class Repository(ABC):
     """Abstract base class for database operations"""
@@ -29,6 +32,22 @@ class Repository(ABC):
         """
         pass
 
+    @abstractmethod
+    def create_simulations_bulk(self, records: Iterable[Dict[str, Any]],
+                                chunk_size: int = DEFAULT_BULK_CHUNK_SIZE) -> List[int]:
+        """
+        Create many simulation records in one transaction
+        
+        Args:
+            records: Dictionaries with input_data and optionally results and status
+                     (default: 'processing'); may be a generator
+            chunk_size: Rows serialized and inserted per statement batch
+            
+        Returns:
+            The IDs of the created simulations, in the order of records
+        """
+        pass
+
     @abstractmethod
     def get_simulation(self, simulation_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -57,6 +76,22 @@ class Repository(ABC):
         """
         pass
 
+    @abstractmethod
+    def update_simulations_bulk(self, updates: Iterable[Dict[str, Any]],
+                                chunk_size: int = DEFAULT_BULK_CHUNK_SIZE) -> int:
+        """
+        Update many simulations with results in one transaction
+        
+        Args:
+            updates: Dictionaries with id, results and optionally status
+                     (default: 'completed'); may be a generator
+            chunk_size: Rows serialized and updated per statement batch
+            
+        Returns:
+            Number of simulations updated (IDs that do not exist are skipped)
+        """
+        pass
+
     @abstractmethod
     def get_all_simulations(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """
@@ -132,3 +167,7 @@ class Repository(ABC):
     def close(self):
         """Close database connection"""
         pass
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics (empty for implementations without a pool)"""
+        return {}
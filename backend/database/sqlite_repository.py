@@ -4,30 +4,40 @@ SQLite implementation of the repository pattern
 
 import sqlite3
 import json
-from typing import Dict, List, Optional, Any
+from concurrent.futures import Future
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Any
 from datetime import datetime
 from contextlib import contextmanager
-from .repository import Repository
+from .repository import DEFAULT_BULK_CHUNK_SIZE, Repository
+from .connections import SQLiteConnectionPool
+from .sqlite_writer import SQLiteWriter
 
 
 class SQLiteRepository(Repository):
     """SQLite implementation of the database repository"""
 
-    def __init__(self, db_path: str = 'pension_simulator.db'):
+    def __init__(self, db_path: str = 'pension_simulator.db', pool_size: int = 8,
+                 pragmas: Optional[Dict[str, Any]] = None, write_batch_size: int = 256):
         """
         Initialize SQLite repository
         
         Args:
             db_path: Path to the SQLite database file
+            pool_size: Long-lived connections kept open at most
+            pragmas: Overrides of connections.DEFAULT_PRAGMAS (WAL, synchronous, cache_size, ...)
+            write_batch_size: Writes committed together by the writer thread at most
         """
         self.db_path = db_path
+        self.pool = SQLiteConnectionPool(db_path, max_connections=pool_size, pragmas=pragmas)
+        # All mutations go through one thread, so they never contend for the write lock
+        self.writer = SQLiteWriter(self.pool, max_batch=write_batch_size)
         self.initialize()
 
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Context manager for one transaction on a pooled connection"""
+        conn = self.pool.acquire()
         try:
             yield conn
             conn.commit()
@@ -35,7 +45,7 @@ class SQLiteRepository(Repository):
             conn.rollback()
             raise
         finally:
-            conn.close()
+            self.pool.release(conn)
 
     def initialize(self):
         """Create tables if they don't exist"""
@@ -65,21 +75,61 @@ class SQLiteRepository(Repository):
 
     def create_simulation(self, input_data: Dict[str, Any]) -> int:
         """Create a new simulation record"""
+        return self.create_simulation_async(input_data).result()
+
+    def create_simulation_async(self, input_data: Dict[str, Any]) -> Future:
+        """Queue a new simulation record; the future resolves to its ID once committed"""
         timestamp = datetime.utcnow().isoformat()
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        row = (timestamp, 'processing', json.dumps(input_data), timestamp, timestamp)
+
+        def insert(cursor):
             cursor.execute('''
                 INSERT INTO simulations 
                 (timestamp, status, input_data, created_at, updated_at)
                 VALUES (?, ?, ?, ?, ?)
-            ''', (
+            ''', row)
+            return cursor.lastrowid
+
+        return self.writer.submit(insert)
+
+    def create_simulations_bulk(self, records: Iterable[Dict[str, Any]],
+                                chunk_size: int = DEFAULT_BULK_CHUNK_SIZE) -> List[int]:
+        """Create many simulation records in one transaction"""
+        return self.create_simulations_bulk_async(records, chunk_size).result()
+
+    def create_simulations_bulk_async(self, records: Iterable[Dict[str, Any]],
+                                      chunk_size: int = DEFAULT_BULK_CHUNK_SIZE) -> Future:
+        """Queue many simulation records; the future resolves to their IDs in order"""
+        timestamp = datetime.utcnow().isoformat()
+
+        def row(record):
+            return (
                 timestamp,
-                'processing',
-                json.dumps(input_data),
+                record.get('status', 'processing'),
+                json.dumps(record['input_data']),
+                json.dumps(record['results']) if record.get('results') is not None else None,
                 timestamp,
                 timestamp
-            ))
-            return cursor.lastrowid
+            )
+
+        # Serialized here, on the caller's thread: the writer only runs executemany while
+        # holding the write lock, and a failing record never reaches the shared transaction
+        chunks = list(_chunks(map(row, records), chunk_size))
+
+        def insert(cursor):
+            ids = []
+            for rows in chunks:
+                cursor.executemany('''
+                    INSERT INTO simulations 
+                    (timestamp, status, input_data, results, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', rows)
+                # The transaction holds the write lock, so its rows get consecutive IDs
+                last_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+                ids.extend(range(last_id - len(rows) + 1, last_id + 1))
+            return ids
+
+        return self.writer.submit(insert)
 
     def get_simulation(self, simulation_id: int) -> Optional[Dict[str, Any]]:
         """Get a simulation by ID"""
@@ -96,21 +146,52 @@ class SQLiteRepository(Repository):
 
     def update_simulation(self, simulation_id: int, results: Dict[str, Any], status: str = 'completed') -> bool:
         """Update a simulation with results"""
+        return self.update_simulation_async(simulation_id, results, status).result()
+
+    def update_simulation_async(self, simulation_id: int, results: Dict[str, Any], status: str = 'completed') -> Future:
+        """Queue a simulation update; the future resolves to whether the row existed"""
         timestamp = datetime.utcnow().isoformat()
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        row = (json.dumps(results), status, timestamp, simulation_id)
+
+        def update(cursor):
             cursor.execute('''
                 UPDATE simulations 
                 SET results = ?, status = ?, updated_at = ?
                 WHERE id = ?
-            ''', (
-                json.dumps(results),
-                status,
-                timestamp,
-                simulation_id
-            ))
+            ''', row)
             return cursor.rowcount > 0
 
+        return self.writer.submit(update)
+
+    def update_simulations_bulk(self, updates: Iterable[Dict[str, Any]],
+                                chunk_size: int = DEFAULT_BULK_CHUNK_SIZE) -> int:
+        """Update many simulations with results in one transaction"""
+        return self.update_simulations_bulk_async(updates, chunk_size).result()
+
+    def update_simulations_bulk_async(self, updates: Iterable[Dict[str, Any]],
+                                      chunk_size: int = DEFAULT_BULK_CHUNK_SIZE) -> Future:
+        """Queue many simulation updates; the future resolves to the number of rows updated"""
+        timestamp = datetime.utcnow().isoformat()
+
+        def row(update):
+            return (json.dumps(update['results']), update.get('status', 'completed'), timestamp, update['id'])
+
+        # Serialized on the caller's thread, see create_simulations_bulk_async
+        chunks = list(_chunks(map(row, updates), chunk_size))
+
+        def update_rows(cursor):
+            updated = 0
+            for rows in chunks:
+                cursor.executemany('''
+                    UPDATE simulations 
+                    SET results = ?, status = ?, updated_at = ?
+                    WHERE id = ?
+                ''', rows)
+                updated += cursor.rowcount
+            return updated
+
+        return self.writer.submit(update_rows)
+
     def get_all_simulations(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
         """Get all simulations with optional pagination"""
         with self.get_connection() as conn:
@@ -127,11 +208,12 @@ class SQLiteRepository(Repository):
 
     def delete_simulation(self, simulation_id: int) -> bool:
         """Delete a simulation by ID"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        def delete(cursor):
             cursor.execute('DELETE FROM simulations WHERE id = ?', (simulation_id,))
             return cursor.rowcount > 0
 
+        return self.writer.submit(delete).result()
+
     def get_simulation_count(self) -> int:
         """Get the total number of simulations"""
         with self.get_connection() as conn:
@@ -155,11 +237,12 @@ class SQLiteRepository(Repository):
 
     def clear_all_simulations(self) -> bool:
         """Delete all simulations (use with caution)"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+        def clear(cursor):
             cursor.execute('DELETE FROM simulations')
             return True
 
+        return self.writer.submit(clear).result()
+
     def get_statistics(self) -> Dict[str, Any]:
         """Get database statistics"""
         with self.get_connection() as conn:
@@ -203,8 +286,13 @@ class SQLiteRepository(Repository):
             }
 
     def close(self):
-        """Close database connection (connection is managed per operation)"""
-        pass
+        """Commit queued writes, stop the writer thread and close all pooled connections"""
+        self.writer.close()
+        self.pool.close()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool and writer statistics"""
+        return dict(self.pool.stats(), writer=self.writer.stats())
 
     def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
         """Convert a database row to a dictionary"""
@@ -217,3 +305,15 @@ class SQLiteRepository(Repository):
             'created_at': row['created_at'],
             'updated_at': row['updated_at']
         }
+
+
+def _chunks(rows, size):
+    """Split an iterable into lists of at most size items"""
+    if size < 1:
+        raise ValueError('chunk_size must be at least 1')
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,158 @@
+"""
+Single writer thread for SQLite: all mutations are queued and committed in groups
+"""
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+from .connections import SQLiteConnectionPool
+from utils.metrics import metrics
+
+WRITE_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+db_write_batch_size = metrics.histogram(
+    'db_write_batch_operations', 'Write operations committed per SQLite transaction', (), WRITE_BATCH_BUCKETS)
+
+_STOP = object()
+
+
+class SQLiteWriter:
+    """
+    Serializes writes through one thread and one transaction per batch
+
+    Each write is a function receiving a cursor. The thread takes all writes that
+    queued up (up to max_batch), runs each inside its own savepoint so a failing
+    write only rolls back itself, and commits them together. Futures are resolved
+    after the commit, so a resolved row ID is durable and visible to readers.
+    With a single writer, connections never wait on each other's write lock.
+    """
+
+    def __init__(self, pool: SQLiteConnectionPool, max_batch: int = 256):
+        """
+        Initialize the writer (the thread starts with the first write)
+
+        Args:
+            pool: Connection pool the writer checks its connection out of
+            max_batch: Writes committed per transaction at most
+        """
+        self.pool = pool
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.transactions = 0
+        self.operations = 0
+        self.largest_batch = 0
+
+    def submit(self, operation: Callable[[sqlite3.Cursor], Any]) -> Future:
+        """
+        Queue a write
+
+        Args:
+            operation: Called with a cursor inside the batch transaction; its return value
+                resolves the future
+
+        Returns:
+            Future of the operation's return value
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError('Database writer is closed')
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+            self._queue.put((operation, future))
+        return future
+
+    def close(self):
+        """Commit the queued writes and stop the thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and group-commit counters"""
+        return {
+            'queued': self._queue.qsize(),
+            'max_batch': self.max_batch,
+            'transactions': self.transactions,
+            'operations': self.operations,
+            'largest_batch': self.largest_batch,
+            'average_batch': round(self.operations / self.transactions, 2) if self.transactions else 0.0
+        }
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            writes = [item for item in batch if item is not _STOP]
+            if writes:
+                self._commit(writes)
+            if len(writes) < len(batch):
+                # close() puts nothing after the stop marker, but drain defensively
+                remaining = []
+                while True:
+                    try:
+                        remaining.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                remaining = [item for item in remaining if item is not _STOP]
+                if remaining:
+                    self._commit(remaining)
+                return
+
+    def _commit(self, writes: List[Tuple[Callable, Future]]):
+        outcomes = []
+        try:
+            conn = self.pool.acquire()
+        except Exception as e:
+            for _, future in writes:
+                future.set_exception(e)
+            return
+
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            cursor = conn.cursor()
+            for operation, future in writes:
+                cursor.execute('SAVEPOINT write_operation')
+                try:
+                    outcomes.append((future, operation(cursor), None))
+                    cursor.execute('RELEASE write_operation')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO write_operation')
+                    cursor.execute('RELEASE write_operation')
+                    outcomes.append((future, None, e))
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for _, future in writes:
+                future.set_exception(e)
+            return
+        finally:
+            self.pool.release(conn)
+
+        self.transactions += 1
+        self.operations += len(writes)
+        self.largest_batch = max(self.largest_batch, len(writes))
+        db_write_batch_size.observe(len(writes))
+        for future, value, error in outcomes:
+            if error is None:
+                future.set_result(value)
+            else:
+                future.set_exception(error)
@@ -0,0 +1,172 @@
+"""
+Write-behind persistence: simulation records are queued and stored in group commits
+"""
+
+import atexit
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, List
+
+from .repository import Repository
+from .factory import get_db
+from utils.metrics import batch_rows, metrics
+
+write_behind_batch_duration = metrics.histogram(
+    'write_behind_batch_duration_seconds', 'Time to store one write-behind batch')
+
+_STOP = object()
+
+
+class SimulationWriter:
+    """
+    Background thread storing complete simulation records in batches
+
+    Requests only enqueue a record; the thread takes whatever has accumulated
+    (up to batch_size records) and stores it with one create_simulations_bulk
+    transaction. When the queue is full, submit() waits up to put_timeout
+    seconds and then stores the record itself, so a slow disk slows requests
+    down instead of growing memory or dropping records.
+    """
+
+    def __init__(self, repository: Callable[[], Repository] = get_db, max_queue: int = 10000,
+                 batch_size: int = 500, put_timeout: float = 1.0):
+        """
+        Initialize the writer (the thread starts with the first record)
+
+        Args:
+            repository: Returns the repository records are written to
+            max_queue: Records waiting to be written before submit() applies backpressure
+            batch_size: Records stored per transaction at most
+            put_timeout: Seconds submit() waits for queue space before writing synchronously
+        """
+        self.repository = repository
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._closed = False
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.synchronous_writes = 0
+
+    def submit(self, record: Dict[str, Any]):
+        """
+        Queue one record for create_simulations_bulk
+
+        Never raises: records that cannot be stored are counted as failed in stats().
+
+        Args:
+            record: {'input_data': ..., 'results': ..., 'status': ...}
+        """
+        try:
+            # The closed check and the put happen under the lock, so no record can be
+            # queued behind the stop marker close() puts after setting _closed
+            with self._lock:
+                if not self._closed:
+                    self._ensure_started()
+                    try:
+                        self._queue.put(record, timeout=self.put_timeout)
+                        return
+                    except queue.Full:
+                        pass
+            self._write_now([record])
+        except Exception as e:
+            self._count('failed', 1)
+            print(f"❌ Write-behind error (1 record lost): {str(e)}")
+
+    def flush(self):
+        """Block until every queued record has been written (or failed)"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write the remaining records and stop the thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and write counters (failed = records lost)"""
+        return {
+            'queued': self._queue.qsize(),
+            'max_queue': self._queue.maxsize,
+            'batch_size': self.batch_size,
+            'written': self.written,
+            'failed': self.failed,
+            'batches': self.batches,
+            'synchronous_writes': self.synchronous_writes
+        }
+
+    def _ensure_started(self):
+        """Start the thread (caller holds the lock)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='simulation-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Group commit: take everything that queued up while the last batch was written
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(record is _STOP for record in batch)
+            records = [record for record in batch if record is not _STOP]
+            if records:
+                self._write(records)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                self._drain()
+                return
+
+    def _drain(self):
+        """Write records that raced with close()"""
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+                self._queue.task_done()
+            except queue.Empty:
+                break
+        if records:
+            self._write(records)
+
+    def _write(self, records: List[Dict[str, Any]]):
+        try:
+            with write_behind_batch_duration.time():
+                self.repository().create_simulations_bulk(records)
+            self._count('written', len(records))
+            self._count('batches', 1)
+            batch_rows.inc(len(records), path='write-behind', outcome='written')
+        except Exception as e:
+            self._count('failed', len(records))
+            batch_rows.inc(len(records), path='write-behind', outcome='failed')
+            print(f"❌ Write-behind error ({len(records)} records lost): {str(e)}")
+
+    def _write_now(self, records: List[Dict[str, Any]]):
+        self._count('synchronous_writes', len(records))
+        self._write(records)
+
+    def _count(self, counter: str, amount: int):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+
+simulation_writer = SimulationWriter(
+    max_queue=int(os.environ.get('WRITE_BEHIND_QUEUE_SIZE', 10000)),
+    batch_size=int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 500))
+)
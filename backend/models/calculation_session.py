@@ -0,0 +1,105 @@
+"""
+Stateful calculation for interactive editing of one person's inputs
+"""
+
+import threading
+from dataclasses import fields
+
+import numpy as np
+
+from models.pension_calculator import PensionCalculator
+from models.records import InsufficientWorkYearsError, PensionInput
+
+# Keys a session accepts in its input and in update() changes
+INPUT_FIELD_NAMES = frozenset(field.name for field in fields(PensionInput))
+
+
+class CalculationSession:
+    """
+    Keeps per-year salary factors and their prefix sums for one career
+
+    Capital after n years is zus_funds + salary * contribution_rate * prefix[n - 1], so
+    - changing work_end_year only extends (or slices) the prefix,
+    - changing zus_funds shifts the capital by a constant,
+    - changing gross_salary or include_sick_leave rescales it.
+    The factors are only rebuilt when work_start_year changes.
+    """
+
+    def __init__(self, input_data, calculator=None):
+        """
+        Start a session
+
+        Args:
+            input_data: calculate_pension input
+            calculator: PensionCalculator whose parameter snapshot the session keeps using
+        """
+        self.calculator = calculator or PensionCalculator()
+        self.input_data = {}
+        self.factor_rebuilds = 0
+        self._start_year = None
+        self._factors = np.zeros(0)
+        self._factor_prefix = np.zeros(0)
+        self._lock = threading.Lock()
+        self.result = self.update(input_data)
+
+    def update(self, changes):
+        """
+        Apply edited input fields and return the new calculate_pension result
+
+        Changes are only applied if they name PensionInput fields and the edited input
+        is valid; otherwise the error is returned and the session keeps its input.
+
+        Args:
+            changes: Mapping of changed input fields (e.g. {'work_end_year': 2052})
+        """
+        unknown = sorted(set(changes) - INPUT_FIELD_NAMES)
+        if unknown:
+            return {'error': f'Unknown input field: {", ".join(unknown)}'}
+
+        with self._lock:
+            input_data = dict(self.input_data, **changes)
+            try:
+                pension_input = PensionInput.from_mapping(input_data)
+            except (ValueError, TypeError) as e:
+                return {'error': f'Invalid data format: {str(e)}'}
+
+            self.input_data = input_data
+            self.result = self._calculate(pension_input)
+            return self.result
+
+    def _calculate(self, pension_input):
+        calculator = self.calculator
+        try:
+            work_end_year, salary = calculator._career(pension_input)
+            work_start_year = pension_input.work_start_year
+            years_of_work = work_end_year - work_start_year
+
+            self._ensure_years(work_start_year, years_of_work)
+            years = np.arange(work_start_year, work_end_year)
+            salaries = salary * self._factors[:years_of_work]
+            contributions = salaries * calculator.contribution_rate
+            capital = pension_input.zus_funds + salary * calculator.contribution_rate * self._factor_prefix[:years_of_work]
+
+            return calculator._build_result(pension_input, work_end_year, (years, salaries, contributions, capital)).to_dict()
+
+        except InsufficientWorkYearsError as e:
+            return {'error': str(e)}
+        except Exception as e:
+            return {'error': f'Błąd kalkulacji: {str(e)}'}
+
+    def _ensure_years(self, start_year, count):
+        """Make the salary factors cover `count` years from start_year, computing only missing years"""
+        if start_year != self._start_year:
+            self._start_year = start_year
+            self._factors = np.zeros(0)
+            self._factor_prefix = np.zeros(0)
+            self.factor_rebuilds += 1
+
+        known = self._factors.size
+        if count <= known:
+            return
+
+        new_factors = self.calculator._salary_factors(np.arange(start_year + known, start_year + count), start_year)
+        offset = self._factor_prefix[-1] if known else 0.0
+        self._factors = np.concatenate([self._factors, new_factors])
+        self._factor_prefix = np.concatenate([self._factor_prefix, offset + np.cumsum(new_factors)])
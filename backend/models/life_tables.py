@@ -0,0 +1,176 @@
+"""
+Actuarial life tables (average further life expectancy in months) stored in a
+compact binary file that is memory-mapped instead of loaded.
+
+File layout (little endian):
+    32-byte header: magic b'ZUSLT1', format version (uint16), first_year,
+                    n_years, min_age_months, n_ages (int32 each), padding
+    float32 data:   [sex (0 = men, 1 = women)][year][age in months]
+
+Every worker process maps the same file read-only, so the table lives once in
+the OS page cache and opening it costs only the header read.
+"""
+
+import csv
+import os
+import struct
+import threading
+from typing import Optional
+
+import numpy as np
+
+MAGIC = b'ZUSLT1'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<6sHiiii')
+HEADER_SIZE = 32
+
+
+class LifeTable:
+    """Read-only, memory-mapped life expectancy table with O(1) lookups"""
+
+    def __init__(self, path: str):
+        """
+        Map a life table file
+
+        Args:
+            path: Path to a file written by write_life_table
+        """
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError('Life table file is truncated')
+
+        magic, version, first_year, n_years, min_age_months, n_ages = HEADER.unpack_from(header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError('Not a supported life table file')
+
+        self.path = path
+        self.first_year = first_year
+        self.n_years = n_years
+        self.min_age_months = min_age_months
+        self.n_ages = n_ages
+        self.months = np.memmap(path, dtype='<f4', mode='r', offset=HEADER_SIZE, shape=(2, n_years, n_ages))
+        self._stamp = os.stat(path).st_mtime_ns
+
+    def __repr__(self):
+        return f'LifeTable(path={self.path!r}, mtime={self._stamp})'
+
+    def life_expectancy_months(self, is_male, age_months, year):
+        """
+        Average further life expectancy in months
+
+        Args:
+            is_male: Boolean (array) selecting the men's or women's table
+            age_months: Exact age in months
+            year: Calendar year of retirement (clamped to the table range)
+        """
+        sex_index = np.where(is_male, 0, 1)
+        year_index = np.clip(np.asarray(year, dtype=np.int64) - self.first_year, 0, self.n_years - 1)
+        age_index = np.clip(np.asarray(age_months, dtype=np.int64) - self.min_age_months, 0, self.n_ages - 1)
+        return self.months[sex_index, year_index, age_index].astype(float)
+
+    def describe(self):
+        """Summary of the mapped table"""
+        return {
+            'path': self.path,
+            'first_year': self.first_year,
+            'last_year': self.first_year + self.n_years - 1,
+            'min_age_months': self.min_age_months,
+            'max_age_months': self.min_age_months + self.n_ages - 1
+        }
+
+
+def write_life_table(path: str, first_year: int, min_age_months: int, men_months, women_months):
+    """
+    Write a life table file
+
+    Args:
+        path: Output file
+        first_year: Calendar year of the first row
+        min_age_months: Age in months of the first column
+        men_months: (n_years, n_ages) life expectancy in months for men
+        women_months: (n_years, n_ages) life expectancy in months for women
+    """
+    data = np.stack([np.asarray(men_months, dtype='<f4'), np.asarray(women_months, dtype='<f4')])
+    if data.ndim != 3:
+        raise ValueError('Life expectancy tables must be 2-D (years x ages)')
+
+    _, n_years, n_ages = data.shape
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, first_year, n_years, min_age_months, n_ages).ljust(HEADER_SIZE, b'\0'))
+        f.write(data.tobytes())
+    # Atomic replace keeps already mapped readers on the old inode
+    os.replace(tmp_path, path)
+
+
+def convert_csv(csv_path: str, output_path: str):
+    """
+    Build a life table file from a CSV with columns
+    year, sex (m/f), age_months, life_expectancy_months (e.g. the GUS tables)
+    """
+    rows = []
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            rows.append((int(row['year']), row['sex'].strip().lower(), int(row['age_months']),
+                         float(row['life_expectancy_months'])))
+    if not rows:
+        raise ValueError('Empty life table CSV')
+
+    years = [r[0] for r in rows]
+    ages = [r[2] for r in rows]
+    first_year, min_age = min(years), min(ages)
+    shape = (max(years) - first_year + 1, max(ages) - min_age + 1)
+    tables = {'m': np.full(shape, np.nan), 'f': np.full(shape, np.nan)}
+    for year, sex, age_months, months in rows:
+        tables[sex][year - first_year, age_months - min_age] = months
+
+    for table in tables.values():
+        if np.isnan(table).any():
+            raise ValueError('Life table CSV must cover every year and age for both sexes')
+
+    write_life_table(output_path, first_year, min_age, tables['m'], tables['f'])
+
+
+class LifeTableRegistry:
+    """Process-wide handle to the configured life table, mapped lazily on first use"""
+
+    def __init__(self):
+        self._table: Optional[LifeTable] = None
+        self._lock = threading.Lock()
+        self.file_path: Optional[str] = os.environ.get('LIFE_TABLE_FILE')
+
+    def get(self) -> Optional[LifeTable]:
+        """Get the mapped life table (None means flat life expectancy parameters)"""
+        if self._table is None and self.file_path:
+            with self._lock:
+                if self._table is None:
+                    self._table = LifeTable(self.file_path)
+        return self._table
+
+    def load(self, file_path: str) -> LifeTable:
+        """Map a different life table file"""
+        table = LifeTable(file_path)
+        with self._lock:
+            self._table = table
+            self.file_path = file_path
+        return table
+
+    def clear(self):
+        """Go back to flat life expectancy parameters"""
+        with self._lock:
+            self._table = None
+            self.file_path = None
+
+
+life_table_registry = LifeTableRegistry()
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) != 3:
+        print('Usage: python -m models.life_tables <input.csv> <output.bin>')
+        sys.exit(1)
+    convert_csv(sys.argv[1], sys.argv[2])
+    print(f'Life table written to {sys.argv[2]}')
@@ -0,0 +1,222 @@
+"""
+Year-varying macroeconomic parameter paths (salary growth, inflation, indexation)
+with cumulative factors precomputed at load time
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Every path is extended to this span (first/last known value carried over)
+GRID_START_YEAR = 1900
+GRID_END_YEAR = 2200
+
+
+class ParameterPaths:
+    """
+    Immutable per-year parameter paths
+
+    For every year y on the grid the cumulative indices
+        wage_index[y]  = prod(1 + salary_growth[u]) for u in (grid start, y]
+        price_index[y] = prod(1 + inflation_rate[u]) for u in (grid start, y]
+    and their prefix sums are computed once, so projections reduce to array
+    lookups instead of repeated (1 + r) ** n evaluations.
+    """
+
+    def __init__(self, version: str, years, salary_growth, inflation_rate,
+                 pension_indexation=None, source: Optional[str] = None):
+        """
+        Build parameter paths
+
+        Args:
+            version: Version label of the parameter set
+            years: Consecutive calendar years covered by the data
+            salary_growth: Nominal salary growth for each year
+            inflation_rate: Inflation for each year
+            pension_indexation: Pension indexation for each year (defaults to inflation)
+            source: Free-form description of where the data comes from
+        """
+        years = np.asarray(years, dtype=np.int64)
+        if years.size == 0 or np.any(np.diff(years) != 1):
+            raise ValueError('Parameter path years must be consecutive and non-empty')
+        if pension_indexation is None:
+            pension_indexation = inflation_rate
+
+        self.version = str(version)
+        self.source = source
+        self.data_first_year = int(years[0])
+        self.data_last_year = int(years[-1])
+        self.first_year = min(GRID_START_YEAR, self.data_first_year)
+        self.last_year = max(GRID_END_YEAR, self.data_last_year)
+        self.size = self.last_year - self.first_year + 1
+
+        self.salary_growth = self._extend(years, salary_growth)
+        self.inflation_rate = self._extend(years, inflation_rate)
+        self.pension_indexation = self._extend(years, pension_indexation)
+
+        self.wage_index = self._cumulative_index(self.salary_growth)
+        self.price_index = self._cumulative_index(self.inflation_rate)
+        self.indexation_index = self._cumulative_index(self.pension_indexation)
+
+        # Exclusive prefix sums: prefix[k] = sum of index[j] for j < k
+        self._wage_prefix = self._frozen(np.concatenate([[0.0], np.cumsum(self.wage_index)]))
+        self._inverse_wage_prefix = self._frozen(np.concatenate([[0.0], np.cumsum(1 / self.wage_index)]))
+
+        self.checksum = hashlib.sha1(
+            self.salary_growth.tobytes() + self.inflation_rate.tobytes() + self.pension_indexation.tobytes()
+        ).hexdigest()[:12]
+
+    @classmethod
+    def from_file(cls, path: str) -> 'ParameterPaths':
+        """Load parameter paths from a versioned JSON file"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        for field in ['version', 'years', 'salary_growth', 'inflation_rate']:
+            if field not in data:
+                raise ValueError(f'Missing field in parameter paths file: {field}')
+
+        return cls(
+            version=data['version'],
+            years=data['years'],
+            salary_growth=data['salary_growth'],
+            inflation_rate=data['inflation_rate'],
+            pension_indexation=data.get('pension_indexation'),
+            source=data.get('source')
+        )
+
+    def __repr__(self):
+        return f'ParameterPaths(version={self.version!r}, checksum={self.checksum!r})'
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary of the loaded parameter set"""
+        return {
+            'version': self.version,
+            'source': self.source,
+            'checksum': self.checksum,
+            'first_year': self.data_first_year,
+            'last_year': self.data_last_year
+        }
+
+    def salary_growth_at(self, year):
+        """Salary growth in the given year(s)"""
+        return self.salary_growth[self._index(year)]
+
+    def inflation_at(self, year):
+        """Inflation in the given year(s)"""
+        return self.inflation_rate[self._index(year)]
+
+    def wage_factor(self, from_year, to_year):
+        """Cumulative salary growth between two years"""
+        return self.wage_index[self._index(to_year)] / self.wage_index[self._index(from_year)]
+
+    def price_factor(self, from_year, to_year):
+        """Cumulative inflation between two years"""
+        return self.price_index[self._index(to_year)] / self.price_index[self._index(from_year)]
+
+    def indexation_factor(self, from_year, to_year):
+        """Cumulative pension indexation between two years"""
+        return self.indexation_index[self._index(to_year)] / self.indexation_index[self._index(from_year)]
+
+    def salary_factors(self, years, start_year, current_year):
+        """
+        Per-year salary factors with the calculator's indexation rules:
+        past years are indexed up to current_year, future years grow from start_year
+        """
+        historical = self.wage_factor(years, current_year)
+        projected = self.wage_factor(start_year - 1, years)
+        return np.where(years < current_year, historical, projected)
+
+    def contribution_factor_sum(self, start_year, end_year, current_year):
+        """Sum of salary_factors over years [start_year, end_year) via prefix sums"""
+        historical_end = np.maximum(np.minimum(end_year, current_year), start_year)
+        historical = self.wage_index[self._index(current_year)] * (
+            self._inverse_wage_prefix[self._prefix_index(historical_end)]
+            - self._inverse_wage_prefix[self._prefix_index(start_year)]
+        )
+
+        projected_start = np.maximum(start_year, current_year)
+        projected_end = np.maximum(end_year, projected_start)
+        projected = (
+            self._wage_prefix[self._prefix_index(projected_end)]
+            - self._wage_prefix[self._prefix_index(projected_start)]
+        ) / self.wage_index[self._index(start_year - 1)]
+
+        return historical + projected
+
+    def _index(self, year):
+        return np.clip(np.asarray(year, dtype=np.int64) - self.first_year, 0, self.size - 1)
+
+    def _prefix_index(self, year):
+        return np.clip(np.asarray(year, dtype=np.int64) - self.first_year, 0, self.size)
+
+    def _extend(self, years, values):
+        values = np.asarray(values, dtype=float)
+        if values.shape != years.shape:
+            raise ValueError('Parameter path values must match the years')
+        grid = np.arange(self.first_year, self.last_year + 1)
+        positions = np.clip(grid - self.data_first_year, 0, values.size - 1)
+        return self._frozen(values[positions])
+
+    def _cumulative_index(self, rates):
+        index = np.concatenate([[1.0], np.cumprod(1 + rates[1:])])
+        return self._frozen(index)
+
+    @staticmethod
+    def _frozen(array):
+        array.setflags(write=False)
+        return array
+
+
+class ParameterPathsRegistry:
+    """
+    Holds the active ParameterPaths
+
+    Readers take the current reference without locking; a reload builds the new
+    object first and then swaps the reference, so in-flight calculations keep
+    using the version they started with.
+    """
+
+    def __init__(self):
+        self._current: Optional[ParameterPaths] = None
+        self._lock = threading.Lock()
+        self.file_path: Optional[str] = None
+
+    def get(self) -> Optional[ParameterPaths]:
+        """Get the active parameter paths (None means flat scalar parameters)"""
+        return self._current
+
+    def load(self, file_path: str) -> ParameterPaths:
+        """Load a parameter paths file and make it active"""
+        paths = ParameterPaths.from_file(file_path)
+        with self._lock:
+            self._current = paths
+            self.file_path = file_path
+        return paths
+
+    def reload(self) -> Optional[ParameterPaths]:
+        """Reload the last loaded file"""
+        if not self.file_path:
+            return None
+        return self.load(self.file_path)
+
+    def clear(self):
+        """Go back to flat scalar parameters"""
+        with self._lock:
+            self._current = None
+            self.file_path = None
+
+
+parameter_paths_registry = ParameterPathsRegistry()
+
+
+def load_parameter_paths_from_env() -> Optional[ParameterPaths]:
+    """Load the file named by PARAMETER_PATHS_FILE, if set"""
+    file_path = os.environ.get('PARAMETER_PATHS_FILE')
+    if not file_path:
+        return None
+    return parameter_paths_registry.load(file_path)
@@ -1,11 +1,39 @@
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+import copy
+import hashlib
+import json
 import math
+from types import SimpleNamespace
+from utils.cache import in_flight, result_cache
+from utils.metrics import timed_calculation
+from models.parameter_paths import parameter_paths_registry
+from models.life_tables import life_table_registry
+from models.salary_history import SalaryHistory
+from models.records import (
+    DeferralBenefit, InsufficientWorkYearsError, PensionInput, PensionResult, format_capital_timeline
+)
 
 class PensionCalculator:
     """Pension calculator for Polish ZUS system"""
 
+    # Input fields consumed by calculate_pension / calculate_pension_batch
+    INPUT_FIELDS = ['age', 'sex', 'gross_salary', 'work_start_year', 'work_end_year',
+                    'zus_funds', 'include_sick_leave']
+
+    # Calculator parameters calculate_pension_batch reads, i.e. the ones that can be overridden per row
+    BATCH_PARAMETERS = frozenset([
+        'retirement_age_men', 'retirement_age_women', 'min_years_men', 'min_years_women',
+        'average_salary_growth', 'inflation_rate', 'avg_sick_leave_men', 'avg_sick_leave_women',
+        'contribution_rate', 'life_expectancy_men', 'life_expectancy_women', 'minimum_pension',
+        'deferral_capital_growth', 'deferral_bonus_monthly', 'average_pension_men',
+        'average_pension_women', 'average_pension_growth'
+    ])
+
+    # Scenario names get_advanced_analysis uses itself
+    RESERVED_SCENARIOS = frozenset(['base', 'higher_salary_growth', 'lower_salary_growth', 'with_sick_leave'])
+
     def __init__(self):
         # Polish pension system parameters (these would come from ZUS/GUS data in production)
         self.current_year = datetime.now().year
@@ -17,81 +45,795 @@ class PensionCalculator:
         self.inflation_rate = 0.025  # 2.5% annual inflation
         self.pension_indexation = 0.02  # 2% annual indexation
 
+        # Optional year-varying paths replacing the flat rates above (see models.parameter_paths).
+        # The snapshot taken here stays in use for this calculator even if a new version is loaded.
+        self.parameter_paths = parameter_paths_registry.get()
+
+        # Optional memory-mapped GUS life tables replacing the flat life expectancy (see models.life_tables)
+        self.life_table = life_table_registry.get()
+
         # Average sick leave days per year (from GUS data)
         self.avg_sick_leave_men = 12
         self.avg_sick_leave_women = 16
 
+        # Contribution, payout and deferral parameters
+        self.contribution_rate = 0.1952  # 19.52% of gross salary
+        self.life_expectancy_men = 19.5  # years
+        self.life_expectancy_women = 23.8  # years
+        self.minimum_pension = 1000.0  # PLN - reduced for demo to show progression
+        self.deferral_capital_growth = 0.08  # 8% annual growth
+        self.deferral_bonus_monthly = 0.0024  # 0.24% per month of deferral
+        self.deferral_horizons = [1, 2, 5]
+        self.max_deferral_months = 120  # deferral curve up to 10 years, month by month
+
+        # Average pension reference values used for comparison
+        self.average_pension_men = 2500
+        self.average_pension_women = 2100
+        self.average_pension_growth = 0.02  # 2% annual growth
+
+        # Monte Carlo projection: yearly shocks around the growth/inflation means
+        self.salary_growth_volatility = 0.015
+        self.inflation_volatility = 0.01
+        self.growth_inflation_correlation = 0.5
+        self.stochastic_percentiles = [10, 50, 90]
+
     def calculate_pension(self, input_data):
         """Calculate pension based on input parameters"""
+        try:
+            return self.calculate(PensionInput.from_mapping(input_data)).to_dict()
+        except InsufficientWorkYearsError as e:
+            return {'error': str(e)}
+        except Exception as e:
+            return {'error': f'Błąd kalkulacji: {str(e)}'}
+
+    @timed_calculation('calculate')
+    def calculate(self, pension_input: PensionInput, salary_history=None) -> PensionResult:
+        """
+        Calculate the pension for validated input
+
+        Args:
+            pension_input: Validated input
+            salary_history: Optional SalaryHistory replacing the flat salary for the years it covers
+
+        Raises:
+            InsufficientWorkYearsError: Fewer years of work than the statutory minimum
+        """
+        work_end_year, salary = self._career(pension_input)
+
+        # Capital timeline and accumulated capital come from one cumulative sum
+        timeline = self._calculate_capital_timeline(
+            salary, pension_input.work_start_year, work_end_year, pension_input.zus_funds, salary_history
+        )
+        return self._build_result(pension_input, work_end_year, timeline)
+
+    def _career(self, pension_input: PensionInput):
+        """
+        Retirement year and contribution base salary of validated input
+
+        Returns:
+            (work_end_year, salary): work_end_year defaults to the statutory retirement year,
+            salary is reduced by sick leave if requested
+
+        Raises:
+            InsufficientWorkYearsError: Fewer years of work than the statutory minimum
+        """
+        sex = pension_input.sex
+        work_end_year = pension_input.work_end_year
+        if work_end_year is None:
+            work_end_year = self._calculate_retirement_year(pension_input.age, sex)
+
+        min_years = self.min_years_men if sex == 'm' else self.min_years_women
+        if work_end_year - pension_input.work_start_year < min_years:
+            raise InsufficientWorkYearsError(f'Niewystarczające lata pracy. Wymagane minimum: {min_years} lat')
+
+        salary = pension_input.gross_salary
+        if pension_input.include_sick_leave:
+            salary = salary * (1 - self._get_sick_leave_reduction(sex))
+        return work_end_year, salary
+
+    def _build_result(self, pension_input, work_end_year, timeline):
+        """Assemble the PensionResult from the capital timeline"""
+        age, sex, gross_salary = pension_input.age, pension_input.sex, pension_input.gross_salary
+        years, salaries, contributions, capital = timeline
+        accumulated_capital = float(capital[-1]) if capital.size else float(pension_input.zus_funds)
+
+        retirement_age_months = (age + work_end_year - self.current_year) * 12
+        actual_amount = self._calculate_monthly_pension(
+            accumulated_capital, sex, retirement_age_months, work_end_year
+        )
+        real_amount = self._calculate_real_pension(actual_amount, work_end_year)
+
+        replacement_rate = (actual_amount / gross_salary) * 100
+
+        avg_pension_year = self._get_average_pension(work_end_year, sex)
+
+        deferral_benefits = self._calculate_deferral_benefits(
+            accumulated_capital, work_end_year, sex, actual_amount, retirement_age_months
+        )
+
+        return PensionResult(
+            actual_amount=round(actual_amount, 2),
+            real_amount=round(real_amount, 2),
+            replacement_rate=round(replacement_rate, 2),
+            accumulated_capital=round(accumulated_capital, 2),
+            years_of_work=work_end_year - pension_input.work_start_year,
+            retirement_year=work_end_year,
+            average_pension_comparison=avg_pension_year,
+            deferral_benefits=deferral_benefits,
+            base_salary=gross_salary,
+            indexation_years=work_end_year - self.current_year,
+            sick_leave_impact=self._calculate_sick_leave_impact(gross_salary, sex) if pension_input.include_sick_leave else 0,
+            timeline=(years, age + years - self.current_year, salaries, contributions, capital)
+        )
+
+    def calculate_pension_cached(self, input_data, cache=None):
+        """calculate_pension memoized on the validated input and the parameter set (see calculate_cached)"""
+        try:
+            return self.calculate_cached(PensionInput.from_mapping(input_data), cache).to_dict()
+        except InsufficientWorkYearsError as e:
+            return {'error': str(e)}
+        except Exception as e:
+            return {'error': f'Błąd kalkulacji: {str(e)}'}
+
+    @timed_calculation('calculate_cached')
+    def calculate_cached(self, pension_input: PensionInput, cache=None) -> PensionResult:
+        """
+        calculate memoized on the input record and the parameter set
+
+        Results are immutable, so one cached record is shared by all callers.
+        Changing any calculator parameter changes the key, so stale entries are never returned.
+        """
+        cache = result_cache if cache is None else cache
+        key = ('calculate', self.parameters_fingerprint(), pension_input)
+
+        hit, result = cache.get(key)
+        if hit:
+            return result
+
+        def compute():
+            result = self.calculate(pension_input)
+            cache.set(key, result)
+            return result
+
+        # Identical concurrent misses share one calculation
+        return in_flight.do((id(cache), key), compute)
+
+    def _coalesce(self, operation, payload, fn):
+        """
+        Run fn() once for concurrent calls of operation with an equal payload and parameter set
+
+        The payload is canonicalized as sorted JSON; payloads that are not JSON-serializable
+        are not coalesced.
+        """
+        try:
+            canonical = json.dumps(payload, sort_keys=True, default=str)
+        except (TypeError, ValueError):
+            return fn()
+        return in_flight.do((operation, self.parameters_fingerprint(), canonical), fn)
+
+    def __setattr__(self, name, value):
+        # Every public attribute is a parameter; setting one invalidates the cached fingerprint
+        if not name.startswith('_'):
+            self.__dict__['_parameters_version'] = self.__dict__.get('_parameters_version', 0) + 1
+        super().__setattr__(name, value)
+
+    def parameters_fingerprint(self):
+        """
+        Hash of all public calculator parameters, used to key cached results
+
+        The hash is computed once per parameter change (assigning any public attribute,
+        including parameter_paths and life_table). Lists such as deferral_horizons must
+        be reassigned rather than mutated in place for the change to be seen.
+        """
+        version = self._parameters_version
+        cached = self.__dict__.get('_fingerprint')
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        parameters = sorted((k, v) for k, v in vars(self).items() if not k.startswith('_'))
+        fingerprint = hashlib.sha1(repr(parameters).encode('utf-8')).hexdigest()
+        # A parameter set while hashing bumps the version, so this entry is never reused
+        self._fingerprint = (version, fingerprint)
+        return fingerprint
+
+    @timed_calculation('calculate_pension_batch')
+    def calculate_pension_batch(self, data, parameters=None):
+        """
+        Vectorized calculate_pension over a whole cohort
+
+        Args:
+            data: pandas DataFrame or mapping of column name -> array-like with
+                  age, sex, gross_salary, work_start_year and optionally
+                  work_end_year, zus_funds, include_sick_leave
+            parameters: Optional mapping of calculator parameter name -> per-row
+                        values overriding the calculator attribute for each row
+                        (NaN keeps the calculator attribute for that row)
+
+        Returns:
+            Dict of NumPy arrays with the calculate_pension result fields
+            (a DataFrame with the same index if a DataFrame was passed).
+            Rows with too few years of work have valid=False and NaN amounts.
+        """
+        columns = self._batch_columns(data)
+        params = self._scenario_parameters(parameters, columns.size) if parameters else self
+        age, is_male, gross_salary = columns.age, columns.is_male, columns.gross_salary
+        work_start_year, zus_funds, include_sick_leave = columns.work_start_year, columns.zus_funds, columns.include_sick_leave
+        work_end_year = self._resolve_work_end_year(columns, params)
+
+        years_of_work = work_end_year - work_start_year
+        min_years = np.where(is_male, params.min_years_men, params.min_years_women)
+        valid = years_of_work >= min_years
+
+        sick_leave_reduction = self._get_sick_leave_reduction_array(is_male, params)
+        salary_factor = np.where(include_sick_leave, 1 - sick_leave_reduction, 1.0)
+
+        accumulated_capital = self._calculate_accumulated_capital_array(
+            gross_salary * salary_factor, work_start_year, work_end_year, zus_funds, params
+        )
+        retirement_age_months = (age + work_end_year - params.current_year) * 12
+        actual_amount = self._calculate_monthly_pension_array(
+            accumulated_capital, is_male, params, retirement_age_months, work_end_year
+        )
+        real_amount = self._calculate_real_pension_array(actual_amount, work_end_year, params)
+        replacement_rate = (actual_amount / gross_salary) * 100
+
+        base_avg = np.where(is_male, params.average_pension_men, params.average_pension_women)
+        average_pension = base_avg * (1 + params.average_pension_growth) ** (work_end_year - params.current_year)
+
+        avg_sick_days = np.where(is_male, params.avg_sick_leave_men, params.avg_sick_leave_women)
+        sick_leave_impact = np.where(include_sick_leave, (avg_sick_days / 365) * gross_salary * 0.2, 0.0)
+
+        def money(values):
+            return np.where(valid, np.round(values, 2), np.nan)
+
+        results = {
+            'valid': valid,
+            'actual_amount': money(actual_amount),
+            'real_amount': money(real_amount),
+            'replacement_rate': money(replacement_rate),
+            'accumulated_capital': money(accumulated_capital),
+            'gross_salary': gross_salary,
+            'years_of_work': years_of_work,
+            'min_years_of_work': min_years,
+            'retirement_year': work_end_year,
+            'average_pension_comparison': np.where(valid, average_pension, np.nan),
+            'indexation_years': work_end_year - params.current_year,
+            'sick_leave_impact': np.where(valid, sick_leave_impact, np.nan),
+        }
+
+        for years in self.deferral_horizons:
+            deferred_pension, real_deferred_pension, increase_percentage = self._calculate_deferral_curve_array(
+                accumulated_capital, is_male, actual_amount, retirement_age_months, work_end_year, years * 12, params
+            )
+
+            results[f'deferral_{years}_years_actual_amount'] = money(deferred_pension)
+            results[f'deferral_{years}_years_real_amount'] = money(real_deferred_pension)
+            results[f'deferral_{years}_years_increase_percentage'] = money(increase_percentage)
+
+        if isinstance(data, pd.DataFrame):
+            return pd.DataFrame(results, index=data.index)
+        return results
+
+    def solve_required_salary(self, data):
+        """
+        Minimum gross salary reaching a target monthly pension, for a batch of people
+
+        The pension is linear in salary (capital = zus_funds + salary * contribution
+        factors), so the required salary is solved in closed form.
+
+        Args:
+            data: Batch columns as for calculate_pension_batch plus target_amount
+
+        Returns:
+            Array of required gross salaries (0 when the minimum pension already
+            reaches the target, NaN when the years of work are insufficient)
+        """
+        columns = self._batch_columns(data)
+        target = np.asarray(data['target_amount'], dtype=float)
+        work_end_year = self._resolve_work_end_year(columns)
+
+        unit_capital = self._unit_contribution_capital(columns, work_end_year)
+        retirement_age_months = (columns.age + work_end_year - self.current_year) * 12
+        required_capital = target * self._life_expectancy_months_array(
+            columns.is_male, None, retirement_age_months, work_end_year
+        )
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            salary = np.maximum((required_capital - columns.zus_funds) / unit_capital, 0.0)
+        salary = np.where(target <= self.minimum_pension, 0.0, salary)
+
+        min_years = np.where(columns.is_male, self.min_years_men, self.min_years_women)
+        return np.where(work_end_year - columns.work_start_year >= min_years, salary, np.nan)
+
+    def solve_retirement_year(self, data, latest_retirement_age=75):
+        """
+        Earliest work_end_year reaching a target monthly pension, for a batch of people
+
+        The pension never decreases with a later retirement year, so all rows are
+        solved together with an integer bisection over the year.
+
+        Args:
+            data: Batch columns as for calculate_pension_batch plus target_amount
+            latest_retirement_age: Upper bound of the search
+
+        Returns:
+            Array of retirement years (NaN when the target is not reachable)
+        """
+        columns = self._batch_columns(data)
+        target = np.asarray(data['target_amount'], dtype=float)
+
+        min_years = np.where(columns.is_male, self.min_years_men, self.min_years_women)
+        low = np.maximum(columns.work_start_year + min_years, self.current_year)
+        high = np.maximum(self.current_year - columns.age + latest_retirement_age, low)
+
+        def reaches_target(year):
+            return self._pension_for_retirement_year(columns, year) >= target
+
+        reachable = reaches_target(high)
+        high = np.where(reachable, high, low)
+        while np.any(low < high):
+            middle = (low + high) // 2
+            ok = reaches_target(middle)
+            high = np.where(ok, middle, high)
+            low = np.where(ok, low, middle + 1)
+
+        return np.where(reachable, low, np.nan)
+
+    @timed_calculation('solve_target_pension')
+    def solve_target_pension(self, input_data, target_amount):
+        """Required salary and retirement year for one person to reach target_amount"""
+        return self._coalesce('solve_target_pension', [input_data, target_amount],
+                              lambda: self._solve_target_pension(input_data, target_amount))
+
+    def _solve_target_pension(self, input_data, target_amount):
+        try:
+            columns = {field: [input_data.get(field)] for field in self.INPUT_FIELDS}
+            work_end_year = columns['work_end_year'][0]
+            columns['work_end_year'] = [np.nan if work_end_year in (None, '') else work_end_year]
+            columns['zus_funds'] = [columns['zus_funds'][0] or 0]
+            columns['include_sick_leave'] = [bool(columns['include_sick_leave'][0])]
+            columns['target_amount'] = [target_amount]
+
+            salary = self.solve_required_salary(columns)[0]
+            year = self.solve_retirement_year(columns)[0]
+            planned_year = int(self._resolve_work_end_year(self._batch_columns(columns))[0])
+
+            return {
+                'target_amount': target_amount,
+                'planned_retirement_year': planned_year,
+                'required_gross_salary': None if np.isnan(salary) else round(float(salary), 2),
+                'required_work_end_year': None if np.isnan(year) else int(year),
+                'required_work_extension': None if np.isnan(year) else max(int(year) - planned_year, 0)
+            }
+
+        except Exception as e:
+            return {'error': f'Błąd kalkulacji celu: {str(e)}'}
+
+    def _unit_contribution_capital(self, columns, work_end_year):
+        """Capital accumulated per 1 PLN of gross salary (without existing funds)"""
+        salary_factor = np.where(
+            columns.include_sick_leave, 1 - self._get_sick_leave_reduction_array(columns.is_male), 1.0
+        )
+        return self._calculate_accumulated_capital_array(salary_factor, columns.work_start_year, work_end_year, 0.0)
+
+    def _pension_for_retirement_year(self, columns, work_end_year):
+        """Monthly pension of each row when retiring in work_end_year"""
+        capital = columns.zus_funds + columns.gross_salary * self._unit_contribution_capital(columns, work_end_year)
+        retirement_age_months = (columns.age + work_end_year - self.current_year) * 12
+        return self._calculate_monthly_pension_array(
+            capital, columns.is_male, None, retirement_age_months, work_end_year
+        )
+
+    def _batch_columns(self, data):
+        """Validate and convert columnar batch input to NumPy arrays"""
+        for field in ['age', 'sex', 'gross_salary', 'work_start_year']:
+            if field not in data:
+                raise ValueError(f'Missing required column: {field}')
+
+        age = np.asarray(data['age'], dtype=np.int64)
+        size = age.shape[0]
+
+        zus_funds = np.asarray(data['zus_funds'], dtype=float) if 'zus_funds' in data else np.zeros(size)
+        if 'include_sick_leave' in data:
+            # Missing values in a DataFrame column are NaN, which would otherwise cast to True
+            include_sick_leave = pd.Series(data['include_sick_leave']).fillna(False).to_numpy(dtype=bool)
+        else:
+            include_sick_leave = np.zeros(size, dtype=bool)
+
+        return SimpleNamespace(
+            size=size,
+            age=age,
+            is_male=np.char.lower(np.asarray(data['sex'], dtype=str)) == 'm',
+            gross_salary=np.asarray(data['gross_salary'], dtype=float),
+            work_start_year=np.asarray(data['work_start_year'], dtype=np.int64),
+            work_end_year=np.asarray(data['work_end_year'], dtype=float) if 'work_end_year' in data else None,
+            zus_funds=np.nan_to_num(zus_funds),
+            include_sick_leave=include_sick_leave
+        )
+
+    def _resolve_work_end_year(self, columns, params=None):
+        """Planned retirement year per row, defaulting missing values to the statutory age"""
+        default_end_year = self._calculate_retirement_year_array(columns.age, columns.is_male, params).astype(np.int64)
+        if columns.work_end_year is None:
+            return default_end_year
+        return np.where(np.isnan(columns.work_end_year), default_end_year, columns.work_end_year).astype(np.int64)
+
+    @timed_calculation('calculate_sensitivity_grid')
+    def calculate_sensitivity_grid(self, input_data, work_end_years, salary_multipliers):
+        """
+        Evaluate a retirement-year x salary grid in one vectorized pass
+
+        Args:
+            input_data: Base simulation input (same fields as calculate_pension)
+            work_end_years: Sequence of retirement years (grid rows)
+            salary_multipliers: Sequence of factors applied to gross_salary (grid columns)
+
+        Returns:
+            Row/column axes plus actual_amount and real_amount matrices;
+            cells with too few years of work are None
+        """
+        try:
+            # Validated like calculate_pension (e.g. an invalid sex is rejected)
+            base = PensionInput.from_mapping(input_data)
+            end_grid, multiplier_grid = np.meshgrid(
+                np.asarray(work_end_years, dtype=np.int64),
+                np.asarray(salary_multipliers, dtype=float),
+                indexing='ij'
+            )
+            size = end_grid.size
+            gross_salaries = base.gross_salary * np.asarray(salary_multipliers, dtype=float)
+
+            results = self.calculate_pension_batch({
+                'age': np.full(size, base.age),
+                'sex': np.full(size, base.sex),
+                'gross_salary': base.gross_salary * multiplier_grid.ravel(),
+                'work_start_year': np.full(size, base.work_start_year),
+                'work_end_year': end_grid.ravel(),
+                'zus_funds': np.full(size, base.zus_funds),
+                'include_sick_leave': np.full(size, base.include_sick_leave)
+            })
+
+            def matrix(values):
+                values = values.reshape(end_grid.shape)
+                return np.where(np.isnan(values), None, values).tolist()
+
+            return {
+                'work_end_years': [int(year) for year in end_grid[:, 0]],
+                'gross_salaries': [round(float(salary), 2) for salary in gross_salaries],
+                'actual_amount': matrix(results['actual_amount']),
+                'real_amount': matrix(results['real_amount'])
+            }
+
+        except Exception as e:
+            return {'error': f'Błąd kalkulacji siatki: {str(e)}'}
+
+    def _calculate_retirement_year_array(self, age, is_male, params=None):
+        """Vectorized _calculate_retirement_year"""
+        params = params or self
+        retirement_age = np.where(is_male, params.retirement_age_men, params.retirement_age_women)
+        return params.current_year - age + retirement_age
+
+    def _calculate_accumulated_capital_array(self, salary, start_year, end_year, zus_funds, params=None):
+        """
+        Closed-form _calculate_accumulated_capital for arrays of people.
+
+        With flat parameters both the historical and the projected segment are
+        geometric series in (1 + average_salary_growth); with parameter paths they
+        are prefix-sum lookups. Either way the cost does not depend on career length.
+        `salary` is expected to already include any sick leave reduction.
+        """
+        params = params or self
+        paths = params.parameter_paths
+
+        if paths is None:
+            factor_sum = self._flat_contribution_factor_sum(start_year, end_year, params)
+        else:
+            factor_sum = paths.contribution_factor_sum(start_year, end_year, params.current_year)
+            flat_rows = self._overridden_rows(params, 'average_salary_growth')
+            if flat_rows is not None:
+                flat = self._flat_contribution_factor_sum(start_year, end_year, params)
+                factor_sum = np.where(flat_rows, flat, factor_sum)
+
+        return zus_funds + salary * params.contribution_rate * factor_sum
+
+    def _flat_contribution_factor_sum(self, start_year, end_year, params):
+        """Sum of yearly salary factors over [start_year, end_year) for a constant growth rate"""
+        ratio = 1 + params.average_salary_growth
+
+        # Historical years y in [start, min(end, now)) are indexed by ratio ** (now - y)
+        historical_end = np.minimum(end_year, params.current_year)
+        historical_count = np.maximum(historical_end - start_year, 0)
+        historical = self._geometric_sum(ratio, params.current_year - historical_end + 1, historical_count)
+
+        # Projected years y in [max(start, now), end) grow by ratio ** (y - start + 1)
+        projected_start = np.maximum(start_year, params.current_year)
+        projected_count = np.maximum(end_year - projected_start, 0)
+        projected = self._geometric_sum(ratio, projected_start - start_year + 1, projected_count)
+
+        return historical + projected
+
+    @staticmethod
+    def _overridden_rows(params, name):
+        """Rows of a scenario batch whose `name` was overridden (they use the flat rate)"""
+        return getattr(params, 'overridden', {}).get(name)
+
+    @staticmethod
+    def _geometric_sum(ratio, first_exponent, count):
+        """Sum of ratio ** k for k in [first_exponent, first_exponent + count)"""
+        ratio = np.asarray(ratio, dtype=float)
+        count = np.maximum(count, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            series = ratio ** first_exponent * (ratio ** count - 1) / (ratio - 1)
+        return np.where(ratio == 1, count, series)
+
+    def _calculate_monthly_pension_array(self, capital, is_male, params=None,
+                                         retirement_age_months=None, retirement_year=None):
+        """Vectorized _calculate_monthly_pension"""
+        params = params or self
+        life_expectancy_months = self._life_expectancy_months_array(
+            is_male, params, retirement_age_months, retirement_year
+        )
+        return np.maximum(capital / life_expectancy_months, params.minimum_pension)
+
+    def _life_expectancy_months_array(self, is_male, params=None, retirement_age_months=None, retirement_year=None):
+        """Further life expectancy in months used as the pension divisor"""
+        params = params or self
+        if params.life_table is not None and retirement_age_months is not None:
+            return params.life_table.life_expectancy_months(is_male, retirement_age_months, retirement_year)
+        life_expectancy = np.where(is_male, params.life_expectancy_men, params.life_expectancy_women)
+        return life_expectancy * 12
+
+    def _calculate_real_pension_array(self, nominal_amount, retirement_year, params=None):
+        """Vectorized _calculate_real_pension"""
+        params = params or self
+        paths = params.parameter_paths
+        flat_price_factor = (1 + params.inflation_rate) ** (retirement_year - params.current_year)
+
+        if paths is None:
+            return nominal_amount / flat_price_factor
+
+        price_factor = paths.price_factor(params.current_year, retirement_year)
+        flat_rows = self._overridden_rows(params, 'inflation_rate')
+        if flat_rows is not None:
+            price_factor = np.where(flat_rows, flat_price_factor, price_factor)
+        return nominal_amount / price_factor
+
+    def _get_sick_leave_reduction_array(self, is_male, params=None):
+        """Vectorized _get_sick_leave_reduction"""
+        params = params or self
+        avg_sick_days = np.where(is_male, params.avg_sick_leave_men, params.avg_sick_leave_women)
+        return (avg_sick_days / 365) * 0.8
+
+    @timed_calculation('simulate_stochastic')
+    def simulate_stochastic(self, input_data, n_paths=10000, seed=None):
+        """
+        Monte Carlo projection of the pension with random wage growth and inflation
+
+        Correlated yearly wage-growth and inflation shocks are drawn for every
+        path as (n_paths x years to retirement) matrices; contributions up to
+        the current year stay deterministic.
+
+        Returns:
+            Percentile bands (P10/P50/P90 by default) for actual_amount,
+            real_amount, accumulated_capital and the yearly capital timeline
+        """
         try:
             age = input_data['age']
             sex = input_data['sex'].lower()
             gross_salary = input_data['gross_salary']
             work_start_year = input_data['work_start_year']
             work_end_year = input_data.get('work_end_year')
-            
             if work_end_year is None or work_end_year == '':
                 work_end_year = self._calculate_retirement_year(age, sex)
-                print(f"🔍 CALC DEBUG - Calculated retirement year: {work_end_year}")
-            
-            print(f"🔍 CALC DEBUG - Input validation:")
-            print(f"  age: {age} (type: {type(age)})")
-            print(f"  sex: {sex} (type: {type(sex)})")
-            print(f"  gross_salary: {gross_salary} (type: {type(gross_salary)})")
-            print(f"  work_start_year: {work_start_year} (type: {type(work_start_year)})")
-            print(f"  work_end_year: {work_end_year} (type: {type(work_end_year)})")
-
-            zus_funds = input_data.get('zus_funds', 0)
+            zus_funds = input_data.get('zus_funds', 0) or 0
             include_sick_leave = input_data.get('include_sick_leave', False)
 
-            if work_end_year is None:
-                return {'error': 'work_end_year cannot be None after validation'}
-            
-            years_of_work = work_end_year - work_start_year
-            print(f"🔍 CALC DEBUG - years_of_work: {years_of_work} (work_end_year: {work_end_year}, work_start_year: {work_start_year})")
-
             min_years = self.min_years_men if sex == 'm' else self.min_years_women
-            if years_of_work < min_years:
+            if work_end_year - work_start_year < min_years:
                 return {
                     'error': f'Niewystarczające lata pracy. Wymagane minimum: {min_years} lat'
                 }
 
-            accumulated_capital = self._calculate_accumulated_capital(
-                gross_salary, work_start_year, work_end_year,
-                zus_funds, include_sick_leave, sex
+            salary = gross_salary
+            if include_sick_leave:
+                salary = salary * (1 - self._get_sick_leave_reduction(sex))
+
+            # Contributions paid before the current year are already known
+            historical_capital = self._calculate_accumulated_capital_array(
+                salary, work_start_year, min(work_end_year, self.current_year), zus_funds
             )
 
-            actual_amount = self._calculate_monthly_pension(accumulated_capital, sex)
-            real_amount = self._calculate_real_pension(actual_amount, work_end_year)
+            horizon = max(work_end_year - self.current_year, 0)
+            years = self.current_year + np.arange(horizon)
+            rng = np.random.default_rng(seed)
+            wage_growth, inflation = self._draw_macro_paths(rng, n_paths, years)
 
-            replacement_rate = (actual_amount / gross_salary) * 100
+            projected_start = max(work_start_year, self.current_year)
+            contributing = years >= projected_start
 
-            avg_pension_year = self._get_average_pension(work_end_year, sex)
+            # Matches the deterministic salary factors when shocks are zero
+            if self.parameter_paths is None:
+                base_salary = salary * (1 + self.average_salary_growth) ** (projected_start - work_start_year)
+            else:
+                base_salary = salary * self.parameter_paths.wage_factor(work_start_year - 1, projected_start - 1)
+            salary_paths = base_salary * np.cumprod(np.where(contributing, 1 + wage_growth, 1.0), axis=1)
+            contributions = np.where(contributing, salary_paths * self.contribution_rate, 0.0)
+            capital_paths = historical_capital + np.cumsum(contributions, axis=1)
+
+            if horizon:
+                final_capital = capital_paths[:, -1]
+                price_level = np.prod(1 + inflation, axis=1)
+            else:
+                final_capital = np.full(n_paths, float(historical_capital))
+                price_level = 1 / float(self._calculate_real_pension_array(1.0, work_end_year))
 
-            deferral_benefits = self._calculate_deferral_benefits(
-                accumulated_capital, work_end_year, sex, actual_amount
+            retirement_age_months = (age + work_end_year - self.current_year) * 12
+            actual_amount = self._calculate_monthly_pension_array(
+                final_capital, sex == 'm', None, retirement_age_months, work_end_year
             )
+            real_amount = actual_amount / price_level
+
+            percentiles = self.stochastic_percentiles
+            timeline_bands = np.percentile(capital_paths, percentiles, axis=0) if horizon else np.empty((len(percentiles), 0))
 
-            results = {
-                'actual_amount': round(actual_amount, 2),
-                'real_amount': round(real_amount, 2),
-                'replacement_rate': round(replacement_rate, 2),
-                'accumulated_capital': round(accumulated_capital, 2),
-                'years_of_work': years_of_work,
+            return {
+                'n_paths': n_paths,
+                'seed': seed,
                 'retirement_year': work_end_year,
-                'average_pension_comparison': avg_pension_year,
-                'deferral_benefits': deferral_benefits,
-                'calculation_details': {
-                    'base_salary': gross_salary,
-                    'indexation_years': work_end_year - self.current_year,
-                    'sick_leave_impact': self._calculate_sick_leave_impact(gross_salary, sex) if include_sick_leave else 0
-                }
+                'actual_amount': self._percentile_bands(actual_amount),
+                'real_amount': self._percentile_bands(real_amount),
+                'accumulated_capital': self._percentile_bands(final_capital),
+                'capital_timeline': [
+                    {
+                        'year': int(year),
+                        **{f'p{p}': round(float(band[j]), 2) for p, band in zip(percentiles, timeline_bands)}
+                    }
+                    for j, year in enumerate(years)
+                ]
             }
 
-            return results
-
         except Exception as e:
-            return {'error': f'Błąd kalkulacji: {str(e)}'}
+            return {'error': f'Błąd symulacji stochastycznej: {str(e)}'}
+
+    def _draw_macro_paths(self, rng, n_paths, years):
+        """Draw correlated (n_paths x len(years)) wage-growth and inflation matrices"""
+        shocks = rng.standard_normal((2, n_paths, len(years)))
+        rho = self.growth_inflation_correlation
+
+        # Shocks are centred on the flat rates or on the year-varying parameter paths
+        if self.parameter_paths is None:
+            mean_growth, mean_inflation = self.average_salary_growth, self.inflation_rate
+        else:
+            mean_growth = self.parameter_paths.salary_growth_at(years)
+            # Inflation of year y + 1 moves prices from y to y + 1
+            mean_inflation = self.parameter_paths.inflation_at(years + 1)
+
+        wage_growth = mean_growth + self.salary_growth_volatility * shocks[0]
+        inflation = mean_inflation + self.inflation_volatility * (
+            rho * shocks[0] + math.sqrt(1 - rho ** 2) * shocks[1]
+        )
+        return wage_growth, inflation
+
+    def _percentile_bands(self, values):
+        """Summarize simulated values as {'p10': ..., 'p50': ..., 'p90': ...}"""
+        bands = np.percentile(values, self.stochastic_percentiles)
+        return {f'p{p}': round(float(v), 2) for p, v in zip(self.stochastic_percentiles, bands)}
+
+    def aggregate_cohorts(self, population, salary_bin=100.0, zus_bin=1000.0):
+        """
+        Collapse a population table into weighted cohorts
+
+        People with the same sex, age, career years and sick leave flag whose salary and
+        ZUS funds fall into the same bins form one cohort with their mean salary and funds.
+
+        Args:
+            population: calculate_pension_batch columns, optionally with a `count` weight
+                        (so an aggregated table can be aggregated again, e.g. to merge chunks)
+            salary_bin: Gross salary bin width in PLN
+            zus_bin: ZUS funds bin width in PLN
+
+        Returns:
+            DataFrame with sex, age, work_start_year, work_end_year, include_sick_leave,
+            gross_salary, zus_funds and count
+        """
+        columns = self._batch_columns(population)
+        count = np.asarray(population['count'], dtype=float) if 'count' in population else np.ones(columns.size)
+
+        frame = pd.DataFrame({
+            'sex': np.where(columns.is_male, 'm', 'f'),
+            'age': columns.age,
+            'work_start_year': columns.work_start_year,
+            'work_end_year': self._resolve_work_end_year(columns),
+            'include_sick_leave': columns.include_sick_leave,
+            'salary_bin': np.floor(columns.gross_salary / salary_bin),
+            'zus_bin': np.floor(columns.zus_funds / zus_bin),
+            'gross_salary': columns.gross_salary * count,
+            'zus_funds': columns.zus_funds * count,
+            'count': count,
+        })
+        keys = ['sex', 'age', 'work_start_year', 'work_end_year', 'include_sick_leave', 'salary_bin', 'zus_bin']
+        cohorts = frame.groupby(keys, sort=False, as_index=False)[['gross_salary', 'zus_funds', 'count']].sum()
+        cohorts['gross_salary'] /= cohorts['count']
+        cohorts['zus_funds'] /= cohorts['count']
+        return cohorts.drop(columns=['salary_bin', 'zus_bin'])
+
+    @timed_calculation('forecast_liabilities')
+    def forecast_liabilities(self, population, first_year=None, last_year=None, block_size=10000):
+        """
+        Projected yearly pension outlay and contribution inflow of a population
+
+        Pensions are evaluated once per cohort; outlay and inflow are then dense
+        (year x cohort) matrices, built in blocks of cohorts and reduced by sex.
+
+        Args:
+            population: Population table (see aggregate_cohorts)
+            first_year: First forecast year (default: current year)
+            last_year: Last forecast year (default: 60 years ahead)
+            block_size: Cohorts per matrix block, bounds memory use
+
+        Returns:
+            Dict with the forecast years and, per year, total/men/women pension outlay and
+            contribution inflow (annual, nominal PLN) and the number of pensioners and contributors
+        """
+        first_year = int(first_year or self.current_year)
+        last_year = int(last_year or first_year + 60)
+        if last_year < first_year:
+            raise ValueError('last_year must not be before first_year')
+
+        cohorts = self.aggregate_cohorts(population)
+        results = self.calculate_pension_batch(cohorts)
+        years = np.arange(first_year, last_year + 1)[:, np.newaxis]
+        totals = {name: np.zeros((years.size, 2)) for name in
+                  ['pension_outlay', 'contribution_inflow', 'pensioners', 'contributors']}
+
+        for block in range(0, len(cohorts), block_size):
+            rows = slice(block, block + block_size)
+            count = cohorts['count'].to_numpy()[rows]
+            is_male = cohorts['sex'].to_numpy()[rows] == 'm'
+            start_year = cohorts['work_start_year'].to_numpy()[rows]
+            end_year = cohorts['work_end_year'].to_numpy()[rows]
+            salary = cohorts['gross_salary'].to_numpy()[rows] * np.where(
+                cohorts['include_sick_leave'].to_numpy()[rows], 1 - self._get_sick_leave_reduction_array(is_male), 1.0
+            )
+            pension = np.nan_to_num(results['actual_amount'].to_numpy()[rows])
+            valid = results['valid'].to_numpy()[rows]
+            by_sex = np.stack([is_male, ~is_male], axis=1).astype(float)
+
+            # Contributions while working, with the same salary projection as the capital
+            working = (years >= start_year) & (years < end_year)
+            contributors = working * count
+            inflow = np.where(working, salary * self._salary_factors(years, start_year), 0.0) * self.contribution_rate * count
+
+            # Pension paid (and indexed) from the retirement year for the life expectancy used as the divisor
+            retirement_age_months = (cohorts['age'].to_numpy()[rows] + end_year - self.current_year) * 12
+            life_years = self._life_expectancy_months_array(is_male, self, retirement_age_months, end_year) / 12
+            paid_share = np.clip(end_year + life_years - years, 0, 1) * (years >= end_year) * valid
+            pensioners = paid_share * count
+            outlay = 12 * pension * self._indexation_factors(end_year, years) * pensioners
+
+            totals['pension_outlay'] += outlay @ by_sex
+            totals['contribution_inflow'] += inflow @ by_sex
+            totals['pensioners'] += pensioners @ by_sex
+            totals['contributors'] += contributors @ by_sex
+
+        def by_sex_lists(matrix):
+            return {
+                'total': np.round(matrix.sum(axis=1), 2).tolist(),
+                'men': np.round(matrix[:, 0], 2).tolist(),
+                'women': np.round(matrix[:, 1], 2).tolist()
+            }
+
+        return {
+            'years': years[:, 0].tolist(),
+            'population': float(cohorts['count'].sum()),
+            'cohorts': len(cohorts),
+            **{name: by_sex_lists(matrix) for name, matrix in totals.items()}
+        }
+
+    def _indexation_factors(self, retirement_year, years):
+        """Pension indexation from the retirement year to `years`"""
+        if self.parameter_paths is None:
+            return (1 + self.pension_indexation) ** (years - retirement_year)
+        return self.parameter_paths.indexation_factor(retirement_year, years)
 
     def _calculate_retirement_year(self, age, sex):
         """Calculate default retirement year based on age and sex"""
@@ -101,89 +843,145 @@ class PensionCalculator:
         retirement_age = self.retirement_age_men if sex == 'm' else self.retirement_age_women
         return birth_year + retirement_age
 
-    def _calculate_accumulated_capital(self, salary, start_year, end_year, zus_funds, include_sick_leave, sex):
+    def _calculate_accumulated_capital(self, salary, start_year, end_year, zus_funds, include_sick_leave, sex,
+                                       salary_history=None):
         """Calculate accumulated capital in ZUS account"""
-        capital = zus_funds
-
-        for year in range(start_year, min(end_year, self.current_year)):
-            indexed_salary = salary * ((1 + self.average_salary_growth) ** (self.current_year - year))
-
-            if include_sick_leave:
-                sick_leave_reduction = self._get_sick_leave_reduction(sex)
-                indexed_salary *= (1 - sick_leave_reduction)
-
-            zus_contribution = indexed_salary * 0.1952
-            capital += zus_contribution
-
-        for year in range(max(start_year, self.current_year), end_year):
-            projected_salary = salary * ((1 + self.average_salary_growth) ** (year - start_year + 1))
-
-            if include_sick_leave:
-                sick_leave_reduction = self._get_sick_leave_reduction(sex)
-                projected_salary *= (1 - sick_leave_reduction)
+        if include_sick_leave:
+            salary = salary * (1 - self._get_sick_leave_reduction(sex))
 
-            zus_contribution = projected_salary * 0.1952
-            capital += zus_contribution
+        if salary_history is not None:
+            # Actual past salaries replace the flat-salary assumption for the years they cover
+            capital = self._calculate_capital_timeline(salary, start_year, end_year, zus_funds, salary_history)[-1]
+            return float(capital[-1]) if capital.size else float(zus_funds)
 
-        return capital
+        # Closed form of the year-by-year contribution sum, see _calculate_accumulated_capital_array
+        capital = self._calculate_accumulated_capital_array(salary, start_year, end_year, zus_funds)
+        return float(capital)
 
-    def _calculate_monthly_pension(self, capital, sex):
+    def _calculate_monthly_pension(self, capital, sex, retirement_age_months=None, retirement_year=None):
         """Calculate monthly pension amount"""
-        life_expectancy = 19.5 if sex == 'm' else 23.8  # years
+        if self.life_table is not None and retirement_age_months is not None:
+            # ZUS formula: capital divided by GUS further life expectancy in months
+            life_expectancy_months = float(
+                self.life_table.life_expectancy_months(sex == 'm', retirement_age_months, retirement_year)
+            )
+        else:
+            life_expectancy = self.life_expectancy_men if sex == 'm' else self.life_expectancy_women
+            life_expectancy_months = life_expectancy * 12
 
-        monthly_pension = capital / (life_expectancy * 12)
+        monthly_pension = capital / life_expectancy_months
 
         # For demonstration purposes, we'll use a lower minimum to show deferral benefits
         # In real ZUS system, minimum pension is guaranteed but deferral bonuses apply
-        minimum_pension = 1000.0  # PLN - reduced for demo to show progression
-        base_pension = max(monthly_pension, minimum_pension)
+        base_pension = max(monthly_pension, self.minimum_pension)
         
         return base_pension
 
     def _calculate_real_pension(self, nominal_amount, retirement_year):
         """Calculate inflation-adjusted pension amount"""
-        years_to_retirement = retirement_year - self.current_year
-        real_amount = nominal_amount / ((1 + self.inflation_rate) ** years_to_retirement)
-        return real_amount
+        return float(self._calculate_real_pension_array(nominal_amount, retirement_year))
 
     def _get_average_pension(self, year, sex):
         """Get average pension for comparison"""
-        base_avg = 2500 if sex == 'm' else 2100
-        growth_rate = 0.02  # 2% annual growth
+        base_avg = self.average_pension_men if sex == 'm' else self.average_pension_women
         years_diff = year - self.current_year
-        return base_avg * ((1 + growth_rate) ** years_diff)
+        return base_avg * ((1 + self.average_pension_growth) ** years_diff)
 
-    def _calculate_deferral_benefits(self, capital, retirement_year, sex, original_pension):
+    def _calculate_deferral_benefits(self, capital, retirement_year, sex, original_pension, retirement_age_months=None):
         """Calculate benefits of deferring retirement"""
-        deferral_benefits = {}
-
-        for years in [1, 2, 5]:
-            deferred_year = retirement_year + years
-            
-            # Capital grows by additional contributions during deferral
-            deferred_capital = capital * ((1 + 0.08) ** years)  # 8% annual growth
-            
-            # ZUS deferral bonus: 0.24% per month of deferral (real ZUS system)
-            deferral_bonus_rate = 1 + (0.0024 * years * 12)  # 0.24% per month
-            
-            # Calculate base pension from increased capital
-            base_deferred_pension = self._calculate_monthly_pension(deferred_capital, sex)
-            
-            # Apply deferral bonus
-            deferred_pension = base_deferred_pension * deferral_bonus_rate
-            
-            real_deferred_pension = self._calculate_real_pension(deferred_pension, deferred_year)
-
-            # Calculate increase percentage compared to original pension
-            increase_percentage = ((deferred_pension / original_pension) - 1) * 100
-
-            deferral_benefits[f'{years}_years'] = {
-                'actual_amount': round(deferred_pension, 2),
-                'real_amount': round(real_deferred_pension, 2),
-                'increase_percentage': round(increase_percentage, 2)
-            }
+        months = np.asarray(self.deferral_horizons) * 12
+        deferred_pension, real_deferred_pension, increase_percentage = self._calculate_deferral_curve_array(
+            capital, sex == 'm', original_pension, retirement_age_months, retirement_year, months
+        )
+
+        return tuple(
+            DeferralBenefit(
+                years=years,
+                actual_amount=round(float(deferred_pension[i]), 2),
+                real_amount=round(float(real_deferred_pension[i]), 2),
+                increase_percentage=round(float(increase_percentage[i]), 2)
+            )
+            for i, years in enumerate(self.deferral_horizons)
+        )
+
+    @timed_calculation('calculate_deferral_curve')
+    def calculate_deferral_curve(self, input_data, horizons_months=None):
+        """
+        Deferred pension for every deferral horizon, reusing the (cached) base result
+
+        Args:
+            input_data: calculate_pension input mapping or PensionInput
+            horizons_months: Deferral horizons in months (default: every month up to max_deferral_months)
+
+        Returns:
+            Dict with the base pension and one point per horizon, or {'error': ...}
+        """
+        if horizons_months is None:
+            months = np.arange(1, self.max_deferral_months + 1)
+        else:
+            months = np.unique(np.asarray(horizons_months, dtype=np.int64))
+        if months.size == 0 or months[0] < 1 or months[-1] > self.max_deferral_months:
+            return {'error': f'Horyzont odroczenia musi wynosić od 1 do {self.max_deferral_months} miesięcy'}
+
+        try:
+            pension_input = input_data if isinstance(input_data, PensionInput) else PensionInput.from_mapping(input_data)
+            base = self.calculate_cached(pension_input)
+        except InsufficientWorkYearsError as e:
+            return {'error': str(e)}
+        except Exception as e:
+            return {'error': f'Błąd kalkulacji: {str(e)}'}
+
+        sex = pension_input.sex
+        retirement_year = base.retirement_year
+        retirement_age_months = (pension_input.age + retirement_year - self.current_year) * 12
+        # Unrounded capital, exactly as _build_result used it for actual_amount and deferral_benefits
+        timeline_capital = base.timeline[-1]
+        capital = float(timeline_capital[-1]) if timeline_capital.size else float(pension_input.zus_funds)
+        original_pension = self._calculate_monthly_pension(capital, sex, retirement_age_months, retirement_year)
+
+        deferred_pension, real_deferred_pension, increase_percentage = self._calculate_deferral_curve_array(
+            capital, sex == 'm', original_pension, retirement_age_months, retirement_year, months
+        )
+
+        return {
+            'retirement_year': retirement_year,
+            'accumulated_capital': base.accumulated_capital,
+            'actual_amount': base.actual_amount,
+            'curve': [
+                {
+                    'months': int(m),
+                    'retirement_year': int(retirement_year + m // 12),
+                    'actual_amount': round(float(deferred_pension[i]), 2),
+                    'real_amount': round(float(real_deferred_pension[i]), 2),
+                    'increase_percentage': round(float(increase_percentage[i]), 2)
+                }
+                for i, m in enumerate(months)
+            ]
+        }
+
+    def _calculate_deferral_curve_array(self, capital, is_male, original_pension, retirement_age_months,
+                                        retirement_year, months, params=None):
+        """
+        Deferred pension, its real value and the increase over original_pension
 
-        return deferral_benefits
+        Person arguments and months (deferral horizons) are broadcast against each
+        other, so one call yields a whole curve for one person or one horizon for a cohort.
+        """
+        params = params or self
+        months = np.asarray(months)
+
+        # Capital keeps growing during deferral, plus the ZUS bonus of 0.24% per month
+        deferred_capital = capital * (1 + params.deferral_capital_growth) ** (months / 12)
+        deferral_bonus_rate = 1 + params.deferral_bonus_monthly * months
+        deferred_age_months = None if retirement_age_months is None else retirement_age_months + months
+
+        deferred_pension = self._calculate_monthly_pension_array(
+            deferred_capital, is_male, params, deferred_age_months, retirement_year + months // 12
+        ) * deferral_bonus_rate
+        real_deferred_pension = self._calculate_real_pension_array(deferred_pension, retirement_year + months / 12, params)
+        increase_percentage = ((deferred_pension / original_pension) - 1) * 100
+
+        return deferred_pension, real_deferred_pension, increase_percentage
 
     def _get_sick_leave_reduction(self, sex):
         """Get sick leave impact on salary"""
@@ -196,94 +994,297 @@ class PensionCalculator:
         sick_leave_cost = (avg_sick_days / 365) * salary * 0.2  # 20% of salary not covered
         return sick_leave_cost
 
-    def get_advanced_analysis(self, input_data):
-        """Get advanced analysis for dashboard"""
-        try:
-            # Get base simulation results
-            base_results = self.calculate_pension(input_data)
-            if 'error' in base_results:
-                return base_results
+    @timed_calculation('get_advanced_analysis')
+    def get_advanced_analysis(self, input_data, scenarios=None):
+        """
+        Get advanced analysis for dashboard
 
-            # Calculate scenarios with different parameters
-            scenarios = {}
-
-            # Scenario: Higher salary growth
-            modified_data = input_data.copy()
-            scenarios['higher_salary_growth'] = self._calculate_scenario(
-                modified_data, salary_growth_multiplier=1.5
-            )
+        Args:
+            input_data: Simulation input
+            scenarios: Optional extra scenarios (name -> overrides, see calculate_scenarios)
+        """
+        return self._coalesce('get_advanced_analysis', [input_data, scenarios],
+                              lambda: self._advanced_analysis(input_data, scenarios))
 
-            # Scenario: Lower salary growth
-            scenarios['lower_salary_growth'] = self._calculate_scenario(
-                modified_data, salary_growth_multiplier=0.7
-            )
+    def _advanced_analysis(self, input_data, scenarios):
+        try:
+            # Base simulation and all scenarios are evaluated in one batch
+            scenario_specs = {
+                'base': {},
+                'higher_salary_growth': {'salary_growth_multiplier': 1.5},
+                'lower_salary_growth': {'salary_growth_multiplier': 0.7},
+            }
 
             # Scenario: Including sick leave if not already included
             if not input_data.get('include_sick_leave', False):
-                scenarios['with_sick_leave'] = self._calculate_scenario(
-                    modified_data, include_sick_leave=True
-                )
+                scenario_specs['with_sick_leave'] = {'include_sick_leave': True}
+
+            reserved = self.RESERVED_SCENARIOS.intersection(scenarios or {})
+            if reserved:
+                raise ValueError(f'Reserved scenario name: {", ".join(sorted(reserved))}')
+            scenario_specs.update(scenarios or {})
 
             # Historical salary analysis (if provided)
             historical_analysis = {}
-            if 'historical_salaries' in input_data:
-                historical_analysis = self._analyze_historical_salaries(
-                    input_data['historical_salaries']
+            salary_history = None
+            if input_data.get('historical_salaries'):
+                salary_history = SalaryHistory.from_input(
+                    input_data['historical_salaries'], input_data['work_start_year']
                 )
+                historical_analysis = self._analyze_historical_salaries(salary_history, input_data)
+
+            # Actual past salaries replace the flat-salary assumption in the base and every scenario
+            scenario_results = self.calculate_scenarios(input_data, scenario_specs, salary_history)
+
+            base_results = scenario_results.pop('base')
+            if 'error' in base_results:
+                return base_results
 
             return {
                 'base_results': base_results,
-                'scenarios': scenarios,
+                'scenarios': scenario_results,
                 'historical_analysis': historical_analysis,
-                'capital_accumulation_projection': self._project_capital_accumulation(input_data)
+                'capital_accumulation_projection': self._project_capital_accumulation(input_data, salary_history)
             }
 
         except Exception as e:
             return {'error': f'Advanced analysis error: {str(e)}'}
 
-    def _calculate_scenario(self, input_data, **modifications):
-        """Calculate pension for modified scenario"""
-        scenario_data = input_data.copy()
+    def calculate_scenarios(self, input_data, scenarios, salary_history=None):
+        """
+        Evaluate several what-if scenarios of one simulation in a single batch
+
+        Args:
+            input_data: Base simulation input
+            scenarios: Mapping of scenario name -> overrides. An override key is
+                       either an input field (e.g. work_end_year, include_sick_leave),
+                       a calculator parameter from BATCH_PARAMETERS (e.g.
+                       inflation_rate, avg_sick_leave_women) or
+                       salary_growth_multiplier, which scales average_salary_growth.
+            salary_history: Optional SalaryHistory used by every scenario. The batch has
+                            no salary histories, so the scenarios are then calculated one
+                            by one (with parameter paths loaded, a scenario overriding a
+                            rate uses flat rates throughout).
+
+        Raises:
+            ValueError: An override names a parameter the batch calculation does not use
+
+        Returns:
+            Mapping of scenario name -> calculate_pension-style result
+        """
+        if salary_history is not None:
+            return {
+                name: self._history_scenario(input_data, overrides, salary_history)
+                for name, overrides in scenarios.items()
+            }
+
+        names = list(scenarios)
+        size = len(names)
+        columns = {
+            field: [input_data.get(field) for _ in names]
+            for field in self.INPUT_FIELDS
+        }
+        parameters = {}
 
-        for key, value in modifications.items():
+        for i, name in enumerate(names):
+            for key, value in scenarios[name].items():
+                if key == 'salary_growth_multiplier':
+                    key, value = 'average_salary_growth', self.average_salary_growth * value
+
+                if key in columns:
+                    columns[key][i] = value
+                else:
+                    self.check_batch_parameter(key)
+                    # Scenarios without this override keep the calculator value (NaN)
+                    parameters.setdefault(key, [np.nan] * size)[i] = value
+
+        columns['work_end_year'] = [np.nan if year in (None, '') else year for year in columns['work_end_year']]
+        columns['zus_funds'] = [funds or 0 for funds in columns['zus_funds']]
+        columns['include_sick_leave'] = [bool(flag) for flag in columns['include_sick_leave']]
+
+        results = self.calculate_pension_batch(columns, parameters)
+        return {name: self._batch_row_to_result(results, i) for i, name in enumerate(names)}
+
+    def _history_scenario(self, input_data, overrides, salary_history):
+        """One calculate_scenarios scenario calculated with a salary history"""
+        calculator = copy.copy(self)
+        data = dict(input_data)
+        for key, value in overrides.items():
             if key == 'salary_growth_multiplier':
-                # This would modify the salary growth rate
-                pass  # Implementation would adjust the growth rate
+                key, value = 'average_salary_growth', self.average_salary_growth * value
+
+            if key in self.INPUT_FIELDS:
+                data[key] = value
             else:
-                scenario_data[key] = value
+                self.check_batch_parameter(key)
+                setattr(calculator, key, value)
+                # As in the batch, an explicit rate replaces the parameter paths
+                if key in ('average_salary_growth', 'inflation_rate'):
+                    calculator.parameter_paths = None
 
-        return self.calculate_pension(scenario_data)
+        try:
+            result = calculator.calculate(PensionInput.from_mapping(data), salary_history).to_dict()
+        except InsufficientWorkYearsError as e:
+            return {'error': str(e)}
+        # Same fields as a batch scenario result
+        del result['capital_accumulation_projection']
+        return result
 
-    def _analyze_historical_salaries(self, historical_salaries):
+    def _calculate_scenario(self, input_data, **modifications):
+        """Calculate pension for modified scenario"""
+        return self.calculate_scenarios(input_data, {'scenario': modifications})['scenario']
+
+    def check_batch_parameter(self, name):
+        """
+        Raise ValueError unless name is a parameter the batch calculation actually uses
+
+        Life expectancy parameters are rejected while a life table is loaded, because the
+        table replaces them.
+        """
+        if name not in self.BATCH_PARAMETERS:
+            raise ValueError(f'Unknown scenario parameter: {name}')
+        if name.startswith('life_expectancy_') and self.life_table is not None:
+            raise ValueError(f'Scenario parameter {name} has no effect while a life table is loaded')
+
+    def _scenario_parameters(self, overrides, size):
+        """Calculator parameters as a namespace, with per-row arrays for overridden ones"""
+        for key in overrides:
+            self.check_batch_parameter(key)
+        params = SimpleNamespace(**{k: v for k, v in vars(self).items() if not k.startswith('_')})
+        params.overridden = {}
+        for key, values in overrides.items():
+            values = np.broadcast_to(np.asarray(values, dtype=float), (size,))
+            # With parameter paths, rows with an explicit rate use that flat rate instead,
+            # even when it equals the calculator value
+            overridden = ~np.isnan(values)
+            setattr(params, key, np.where(overridden, values, getattr(self, key)))
+            params.overridden[key] = overridden
+        return params
+
+    @timed_calculation('calculate_many')
+    def calculate_many(self, pension_inputs):
+        """
+        calculate_pension-style results (without the capital projection) for many
+        validated PensionInput records, evaluated in one batch
+        """
+        columns = {field: [getattr(p, field) for p in pension_inputs] for field in self.INPUT_FIELDS}
+        columns['work_end_year'] = [np.nan if year is None else year for year in columns['work_end_year']]
+        results = self.calculate_pension_batch(columns)
+        return [self._batch_row_to_result(results, i) for i in range(len(pension_inputs))]
+
+    def _batch_row_to_result(self, results, i):
+        """Rebuild the calculate_pension result dict for one row of a batch result"""
+        if not results['valid'][i]:
+            return {
+                'error': f'Niewystarczające lata pracy. Wymagane minimum: {int(results["min_years_of_work"][i])} lat'
+            }
+
+        return {
+            'actual_amount': float(results['actual_amount'][i]),
+            'real_amount': float(results['real_amount'][i]),
+            'replacement_rate': float(results['replacement_rate'][i]),
+            'accumulated_capital': float(results['accumulated_capital'][i]),
+            'years_of_work': int(results['years_of_work'][i]),
+            'retirement_year': int(results['retirement_year'][i]),
+            'average_pension_comparison': float(results['average_pension_comparison'][i]),
+            'deferral_benefits': {
+                f'{years}_years': {
+                    'actual_amount': float(results[f'deferral_{years}_years_actual_amount'][i]),
+                    'real_amount': float(results[f'deferral_{years}_years_real_amount'][i]),
+                    'increase_percentage': float(results[f'deferral_{years}_years_increase_percentage'][i])
+                }
+                for years in self.deferral_horizons
+            },
+            'calculation_details': {
+                'base_salary': float(results['gross_salary'][i]),
+                'indexation_years': int(results['indexation_years'][i]),
+                'sick_leave_impact': float(results['sick_leave_impact'][i])
+            }
+        }
+
+    def _analyze_historical_salaries(self, salary_history, input_data):
         """Analyze impact of historical salary data"""
-        # Mock analysis - in production, would calculate actual impact TODO
+        years, salary, _ = salary_history.annual()
+        indexed_capital = np.sum(salary * self._indexation_to_current(years)) * self.contribution_rate
+
+        growth = salary_history.growth_rate()
+        volatility = salary_history.volatility()
+        gaps = salary_history.gaps()
+
+        work_end_year = input_data.get('work_end_year')
+        if work_end_year is None or work_end_year == '':
+            work_end_year = self._calculate_retirement_year(input_data['age'], input_data['sex'].lower())
+        last_salary = salary_history.last_paid_salary()
+        projection_growth = self.average_salary_growth if growth is None else growth
+        projected_salary = None
+        if last_salary is not None:
+            projected_salary = last_salary * (1 + projection_growth) ** max(work_end_year - salary_history.last_year, 0)
+
         return {
-            'average_annual_growth': 0.045,
-            'salary_volatility': 0.12,
-            'projected_future_salary': historical_salaries[-1] * 1.5
+            'frequency': salary_history.frequency,
+            'first_year': salary_history.first_year,
+            'last_year': salary_history.last_year,
+            'average_annual_growth': None if growth is None else round(growth, 4),
+            'salary_volatility': None if volatility is None else round(volatility, 4),
+            'contribution_gaps': gaps,
+            'gap_months': sum(gap['months'] for gap in gaps),
+            'indexed_contribution_capital': round(float(indexed_capital), 2),
+            'projected_future_salary': None if projected_salary is None else round(projected_salary, 2)
         }
 
-    def _project_capital_accumulation(self, input_data):
+    def _project_capital_accumulation(self, input_data, salary_history=None):
         """Project capital accumulation over time"""
-        projections = []
-
+        age = input_data['age']
+        sex = input_data['sex'].lower()
         work_start_year = input_data['work_start_year']
-        work_end_year = input_data.get('work_end_year',
-            self._calculate_retirement_year(input_data['age'], input_data['sex']))
+        work_end_year = input_data.get('work_end_year')
+        if work_end_year is None or work_end_year == '':
+            work_end_year = self._calculate_retirement_year(age, sex)
 
         salary = input_data['gross_salary']
+        if input_data.get('include_sick_leave', False):
+            salary = salary * (1 - self._get_sick_leave_reduction(sex))
 
-        for year in range(work_start_year, work_end_year + 1):
-            years_worked = year - work_start_year + 1
-            projected_salary = salary * ((1 + self.average_salary_growth) ** years_worked)
+        timeline = self._calculate_capital_timeline(
+            salary, work_start_year, work_end_year, input_data.get('zus_funds', 0) or 0, salary_history
+        )
+        return self._format_capital_timeline(age, *timeline)
 
-            # Simple projection (in production, would be more sophisticated)
-            projected_capital = projected_salary * years_worked * 0.1952 * 0.7  # Rough estimate
+    def _calculate_capital_timeline(self, salary, start_year, end_year, zus_funds, salary_history=None):
+        """
+        Year-by-year contributions and running capital for years [start_year, end_year)
 
-            projections.append({
-                'year': year,
-                'projected_salary': round(projected_salary, 2),
-                'projected_capital': round(projected_capital, 2)
-            })
+        Uses the same yearly indexation as _calculate_accumulated_capital, so the
+        last capital value is the accumulated capital. With a SalaryHistory, the
+        covered part of each year uses the actual salary indexed to today.
+
+        Returns:
+            (years, salaries, contributions, capital) arrays
+        """
+        years = np.arange(start_year, end_year)
+        salaries = salary * self._salary_factors(years, start_year)
+        if salary_history is not None:
+            history_salary, coverage = salary_history.for_years(years)
+            salaries = salaries * (1 - coverage) + history_salary * self._indexation_to_current(years)
+        contributions = salaries * self.contribution_rate
+        capital = zus_funds + np.cumsum(contributions)
+        return years, salaries, contributions, capital
+
+    def _indexation_to_current(self, years):
+        """Wage indexation of past salaries to the current year (1 from the current year on)"""
+        if self.parameter_paths is None:
+            factors = (1 + self.average_salary_growth) ** (self.current_year - years)
+        else:
+            factors = self.parameter_paths.wage_factor(years, self.current_year)
+        return np.where(years < self.current_year, factors, 1.0)
+
+    def _salary_factors(self, years, start_year):
+        """Salary in `years` relative to the entered salary (past years indexed to today, future ones projected)"""
+        if self.parameter_paths is None:
+            exponents = np.where(years < self.current_year, self.current_year - years, years - start_year + 1)
+            return (1 + self.average_salary_growth) ** exponents
+        return self.parameter_paths.salary_factors(years, start_year, self.current_year)
 
-        return projections
+    def _format_capital_timeline(self, age, years, salaries, contributions, capital):
+        """Convert timeline arrays to the list of dicts returned by the API"""
+        return format_capital_timeline(years, age + years - self.current_year, salaries, contributions, capital)
@@ -0,0 +1,212 @@
+"""
+Typed, immutable input and result records for PensionCalculator
+"""
+
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+REQUIRED_FIELDS = ('age', 'sex', 'gross_salary', 'work_start_year')
+
+# Frontend (camelCase) field names of PensionInput fields
+FRONTEND_FIELDS = {
+    'age': 'age',
+    'sex': 'gender',
+    'gross_salary': 'grossSalary',
+    'work_start_year': 'workStartYear',
+    'work_end_year': 'workEndYear',
+    'zus_funds': 'currentFunds',
+    'include_sick_leave': 'sickLeaveImpact',
+    'expected_pension': 'expectedPension',
+    'postal_code': 'postalCode'
+}
+
+GENDER_MAPPING = {'male': 'm', 'female': 'f'}
+
+
+class InsufficientWorkYearsError(ValueError):
+    """The career is shorter than the statutory minimum"""
+
+
+def _is_blank(value):
+    return value is None or value == ''
+
+
+@dataclass(frozen=True, slots=True)
+class PensionInput:
+    """Validated calculate_pension input; hashable, so it is also the result cache key"""
+
+    age: int
+    sex: str
+    gross_salary: float
+    work_start_year: int
+    work_end_year: Optional[int] = None
+    zus_funds: float = 0.0
+    include_sick_leave: bool = False
+    # Stored with the simulation but not used by the calculation
+    expected_pension: Optional[float] = field(default=None, compare=False)
+    postal_code: Optional[str] = field(default=None, compare=False)
+
+    @classmethod
+    def from_mapping(cls, data) -> 'PensionInput':
+        """
+        Validate and convert a snake_case input mapping
+
+        Raises:
+            ValueError: A required field is missing or a value has the wrong type
+        """
+        for name in REQUIRED_FIELDS:
+            if _is_blank(data.get(name)):
+                raise ValueError(f'Missing required field: {name}')
+
+        sex = str(data['sex']).lower()
+        if sex not in ('m', 'f'):
+            raise ValueError(f'Invalid sex: {data["sex"]}')
+
+        work_end_year = data.get('work_end_year')
+        expected_pension = data.get('expected_pension')
+        return cls(
+            age=int(data['age']),
+            sex=sex,
+            gross_salary=float(data['gross_salary']),
+            work_start_year=int(data['work_start_year']),
+            work_end_year=None if _is_blank(work_end_year) else int(work_end_year),
+            zus_funds=float(data.get('zus_funds') or 0),
+            include_sick_leave=bool(data.get('include_sick_leave', False)),
+            expected_pension=None if _is_blank(expected_pension) else float(expected_pension),
+            postal_code=data.get('postal_code')
+        )
+
+    @classmethod
+    def from_frontend(cls, data) -> 'PensionInput':
+        """Validate and convert the frontend (camelCase, male/female) input format"""
+        mapped = {name: data.get(frontend_name) for name, frontend_name in FRONTEND_FIELDS.items()}
+        mapped['sex'] = GENDER_MAPPING.get(mapped['sex'], mapped['sex'])
+        # The frontend sends '' or 0 for fields left empty
+        mapped['work_end_year'] = mapped['work_end_year'] or None
+        mapped['expected_pension'] = mapped['expected_pension'] or None
+
+        for name in REQUIRED_FIELDS:
+            if _is_blank(mapped[name]):
+                raise ValueError(f'Missing required field: {name}')
+        try:
+            return cls.from_mapping(mapped)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f'Invalid data format: {str(e)}')
+
+    def replace(self, **changes) -> 'PensionInput':
+        """Copy with some fields changed"""
+        return replace(self, **changes)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Plain dict with all fields (as stored with the simulation)"""
+        return asdict(self)
+
+
+@dataclass(frozen=True, slots=True)
+class DeferralBenefit:
+    """Pension when retirement is deferred by `years`"""
+
+    years: int
+    actual_amount: float
+    real_amount: float
+    increase_percentage: float
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            'actual_amount': self.actual_amount,
+            'real_amount': self.real_amount,
+            'increase_percentage': self.increase_percentage
+        }
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class PensionResult:
+    """
+    calculate_pension result
+
+    The capital timeline is kept as arrays (years, ages, salaries, contributions,
+    capital) and only turned into a list of dicts when serialized.
+    """
+
+    actual_amount: float
+    real_amount: float
+    replacement_rate: float
+    accumulated_capital: float
+    years_of_work: int
+    retirement_year: int
+    average_pension_comparison: float
+    deferral_benefits: Tuple[DeferralBenefit, ...]
+    base_salary: float
+    indexation_years: int
+    sick_leave_impact: float
+    timeline: Tuple[np.ndarray, ...]
+
+    def deferral_benefit(self, years) -> Optional[DeferralBenefit]:
+        """Deferral benefit for the given horizon in years, if calculated"""
+        for benefit in self.deferral_benefits:
+            if benefit.years == years:
+                return benefit
+        return None
+
+    def capital_projection(self) -> List[Dict[str, Any]]:
+        """Capital timeline in the API format"""
+        return format_capital_timeline(*self.timeline)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The calculate_pension result dict"""
+        return {
+            'actual_amount': self.actual_amount,
+            'real_amount': self.real_amount,
+            'replacement_rate': self.replacement_rate,
+            'accumulated_capital': self.accumulated_capital,
+            'years_of_work': self.years_of_work,
+            'retirement_year': self.retirement_year,
+            'average_pension_comparison': self.average_pension_comparison,
+            'deferral_benefits': {f'{b.years}_years': b.to_dict() for b in self.deferral_benefits},
+            'capital_accumulation_projection': self.capital_projection(),
+            'calculation_details': {
+                'base_salary': self.base_salary,
+                'indexation_years': self.indexation_years,
+                'sick_leave_impact': self.sick_leave_impact
+            }
+        }
+
+    def to_frontend_dict(self) -> Dict[str, Any]:
+        """The /api/calculate-pension response format"""
+
+        def scenario(years):
+            benefit = self.deferral_benefit(years)
+            return {
+                'amount': benefit.actual_amount if benefit else 0,
+                'increase': benefit.increase_percentage if benefit else 0
+            }
+
+        return {
+            # The frontend calls the nominal amount real_amount and the real one inflation_adjusted_amount
+            'real_amount': self.actual_amount,
+            'inflation_adjusted_amount': self.real_amount,
+            'replacement_rate': self.replacement_rate,
+            'average_pension_comparison': self.average_pension_comparison,
+            'delayed_retirement_scenarios': {
+                'one_year': scenario(1),
+                'two_years': scenario(2),
+                'five_years': scenario(5)
+            },
+            'funds_growth_timeline': self.capital_projection()
+        }
+
+
+def format_capital_timeline(years, ages, salaries, contributions, capital) -> List[Dict[str, Any]]:
+    """Convert timeline arrays to the list of dicts returned by the API"""
+    return [
+        {
+            'year': int(year),
+            'age': int(age),
+            'projected_salary': round(float(salary), 2),
+            'annual_contribution': round(float(contribution), 2),
+            'total_funds': round(float(funds), 2)
+        }
+        for year, age, salary, contribution, funds in zip(years, ages, salaries, contributions, capital)
+    ]
@@ -0,0 +1,139 @@
+"""
+User-supplied salary histories (monthly or annual) and their vectorized statistics
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Longest accepted history, keeps analysis cost bounded for uploaded files
+MAX_HISTORY_YEARS = 80
+
+
+class SalaryHistory:
+    """
+    Salary history as consecutive periods
+
+    Missing (None/NaN) and zero values are gaps in which no contributions were paid.
+    A monthly history is aggregated per calendar year as the sum of monthly salaries / 12,
+    i.e. in the same unit as the calculator's gross_salary.
+    """
+
+    def __init__(self, values, start_year: int, frequency: str = 'annual', start_month: int = 1):
+        """
+        Build a salary history
+
+        Args:
+            values: Salary for each period (None/NaN/0 for periods without contributions)
+            start_year: Calendar year of the first period
+            frequency: 'annual' or 'monthly'
+            start_month: Calendar month (1-12) of the first period of a monthly history
+        """
+        if frequency not in ('annual', 'monthly'):
+            raise ValueError(f'Unknown salary history frequency: {frequency}')
+        if not 1 <= start_month <= 12:
+            raise ValueError('start_month must be between 1 and 12')
+
+        values = np.asarray(values, dtype=float)
+        if values.ndim != 1 or values.size == 0:
+            raise ValueError('Salary history must be a non-empty list of values')
+
+        self.frequency = frequency
+        self.periods_per_year = 12 if frequency == 'monthly' else 1
+        if values.size > MAX_HISTORY_YEARS * self.periods_per_year:
+            raise ValueError(f'Salary history is limited to {MAX_HISTORY_YEARS} years')
+        if np.any(values < 0):
+            raise ValueError('Salary history values must not be negative')
+
+        self.paid = np.isfinite(values) & (values > 0)
+        self.values = np.where(self.paid, values, 0.0)
+
+        # Absolute month index (year * 12 + month - 1) at which every period starts
+        if frequency == 'monthly':
+            self.month_index = int(start_year) * 12 + (int(start_month) - 1) + np.arange(values.size)
+        else:
+            self.month_index = (int(start_year) + np.arange(values.size)) * 12
+        self.period_years = self.month_index // 12
+        self.first_year = int(self.period_years[0])
+        self.last_year = int(self.period_years[-1])
+
+    @classmethod
+    def from_input(cls, data, default_start_year: int) -> 'SalaryHistory':
+        """
+        Parse the historical_salaries input field
+
+        Accepts a plain list (annual values starting at default_start_year) or a dict
+        {"frequency": "monthly", "start_year": 2000, "start_month": 1, "values": [...]}
+        """
+        if isinstance(data, dict):
+            return cls(
+                data.get('values', []),
+                int(data.get('start_year', default_start_year)),
+                data.get('frequency', 'annual'),
+                int(data.get('start_month', 1))
+            )
+        return cls(data, default_start_year)
+
+    def annual(self):
+        """
+        Per calendar year from first_year to last_year
+
+        Returns:
+            (years, salary, coverage): salary in gross_salary units and the fraction
+            of the year that lies inside the history
+        """
+        year_index = self.period_years - self.first_year
+        years = np.arange(self.first_year, self.last_year + 1)
+        if self.frequency == 'annual':
+            return years, self.values.copy(), np.ones(years.size)
+        salary = np.bincount(year_index, weights=self.values, minlength=years.size) / 12
+        coverage = np.bincount(year_index, minlength=years.size) / 12
+        return years, salary, coverage
+
+    def for_years(self, years):
+        """annual() aligned to the given calendar years (zero outside the history)"""
+        history_years, salary, coverage = self.annual()
+        years = np.asarray(years)
+        index = np.clip(years - self.first_year, 0, history_years.size - 1)
+        inside = (years >= self.first_year) & (years <= self.last_year)
+        return np.where(inside, salary[index], 0.0), np.where(inside, coverage[index], 0.0)
+
+    def growth_rate(self) -> Optional[float]:
+        """Annual salary growth from a log-linear fit over the paid periods"""
+        if np.count_nonzero(self.paid) < 2:
+            return None
+        time = self.month_index[self.paid] / 12
+        if time[-1] == time[0]:
+            return None
+        slope = np.polyfit(time, np.log(self.values[self.paid]), 1)[0]
+        return float(np.expm1(slope))
+
+    def volatility(self) -> Optional[float]:
+        """Annualized standard deviation of log salary changes between consecutive paid periods"""
+        consecutive = self.paid[1:] & self.paid[:-1]
+        if np.count_nonzero(consecutive) < 2:
+            return None
+        logs = np.log(np.where(self.paid, self.values, 1.0))
+        changes = np.diff(logs)[consecutive]
+        return float(np.std(changes, ddof=1) * np.sqrt(self.periods_per_year))
+
+    def gaps(self) -> List[Dict[str, Any]]:
+        """Runs of periods without contributions"""
+        edges = np.diff(np.concatenate([[0], (~self.paid).astype(np.int8), [0]]))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) - 1
+        return [
+            {'start': self._label(start), 'end': self._label(end), 'months': int(end - start + 1) * (12 // self.periods_per_year)}
+            for start, end in zip(starts, ends)
+        ]
+
+    def last_paid_salary(self) -> Optional[float]:
+        """Most recent salary with contributions paid"""
+        paid = np.flatnonzero(self.paid)
+        return float(self.values[paid[-1]]) if paid.size else None
+
+    def _label(self, period):
+        month_index = int(self.month_index[period])
+        if self.frequency == 'annual':
+            return month_index // 12
+        return f'{month_index // 12}-{month_index % 12 + 1:02d}'
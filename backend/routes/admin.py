@@ -2,9 +2,15 @@
 Admin routes for database management
 """
 
+import os
 from flask import Blueprint, request, jsonify
 from datetime import datetime
 from database.factory import get_db
+from utils.cache import in_flight, result_cache
+from utils.jobs import job_queue
+from database.write_behind import simulation_writer
+from models.parameter_paths import parameter_paths_registry
+from models.life_tables import life_table_registry
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -159,6 +165,108 @@ def database_health():
         }), 500
 
 
+@admin_bp.route('/cache', methods=['GET'])
+def cache_stats():
+    """Get calculation result cache counters"""
+    try:
+        return jsonify(dict(result_cache.stats(), single_flight=in_flight.stats()))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/cache/clear', methods=['POST'])
+def clear_cache():
+    """Drop all cached calculation results"""
+    try:
+        result_cache.clear()
+        return jsonify({'message': 'Result cache cleared'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/jobs', methods=['GET'])
+def job_stats():
+    """Get background job queue statistics"""
+    try:
+        return jsonify(job_queue.stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/write-behind', methods=['GET'])
+def write_behind_stats():
+    """Get write-behind queue depth and write counters"""
+    try:
+        return jsonify(simulation_writer.stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/db-pool', methods=['GET'])
+def db_pool_stats():
+    """Get database connection pool statistics"""
+    try:
+        db = get_db()
+        return jsonify(db.pool_stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/parameter-paths', methods=['GET'])
+def parameter_paths_info():
+    """Get the active macro parameter paths version"""
+    try:
+        paths = parameter_paths_registry.get()
+        return jsonify({
+            'active': paths is not None,
+            'file': parameter_paths_registry.file_path,
+            'parameters': paths.describe() if paths else None
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/parameter-paths/reload', methods=['POST'])
+def reload_parameter_paths():
+    """
+    Reload the configured macro parameter paths file (PARAMETER_PATHS_FILE)
+
+    The file cannot be chosen by the caller, so the endpoint never opens arbitrary paths;
+    publish a new version by replacing the configured file.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if data.get('file'):
+            return jsonify({'error': 'Only the configured PARAMETER_PATHS_FILE can be reloaded'}), 400
+
+        file_path = os.environ.get('PARAMETER_PATHS_FILE') or parameter_paths_registry.file_path
+        if not file_path:
+            return jsonify({'error': 'No parameter paths file configured'}), 400
+
+        paths = parameter_paths_registry.load(file_path)
+        return jsonify({
+            'message': 'Parameter paths loaded',
+            'parameters': paths.describe()
+        })
+    except (OSError, ValueError) as e:
+        return jsonify({'error': f'Invalid parameter paths file: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/life-table', methods=['GET'])
+def life_table_info():
+    """Get the memory-mapped life table in use"""
+    try:
+        table = life_table_registry.get()
+        return jsonify({
+            'active': table is not None,
+            'table': table.describe() if table else None
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_bp.route('/backup-info', methods=['GET'])
 def backup_info():
     """Get information about database backup"""
@@ -1,42 +1,133 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context
 from datetime import datetime
 import pandas as pd
 import numpy as np
 import os
 import json
-import random
+import uuid
+from itertools import islice
 from models.pension_calculator import PensionCalculator
+from models.calculation_session import CalculationSession
+from models.records import InsufficientWorkYearsError, PensionInput
+from utils.cache import LRUCache
+from utils.jobs import JobQueueFull, job_queue
+from utils.metrics import batch_chunk_duration, batch_rows
+from utils.static_responses import RandomFactTable, StaticJSON
 from utils.report_generator import generate_report
 from database.factory import get_db
+from database.write_behind import simulation_writer
 
 api_bp = Blueprint('api', __name__)
 
+# Upper bound on Monte Carlo paths per request
+MAX_STOCHASTIC_PATHS = 100000
+
+# Upper bound on cells in a sensitivity grid
+MAX_GRID_CELLS = 10000
+
+# Rows calculated and persisted together by /simulate-batch
+BATCH_CHUNK_SIZE = 1000
+
+# Interactive calculation sessions (per process), dropped after 30 minutes without use
+calculation_sessions = LRUCache(maxsize=1024, ttl=1800, sliding=True)
+
+# Mock data - in production, this would come from ZUS/GUS/NBP data sources
+DASHBOARD_DATA = {
+    'average_pensions': {
+        'general': 2500.00,
+        'men': 2800.00,
+        'women': 2200.00,
+        'by_voivodeship': {
+            'śląskie': 2900.00,
+            'mazowieckie': 2700.00,
+            'małopolskie': 2400.00
+        }
+    },
+    'did_you_know': [
+        "Najwyższa emerytura w Polsce jest wypłacana mieszkańcowi województwa śląskiego i wynosi 15 000 PLN",
+        "Średni czas spędzony na zwolnieniu lekarskim w Polsce to 14 dni w roku",
+        "Wysokość emerytury zależy od 80% najlepszych lat pracy"
+    ],
+}
+
+PENSION_FACTS = [
+    "Średnia emerytura w Polsce wynosi około 2,800 zł brutto.",
+    "Kobiety przechodzą na emeryturę w wieku 60 lat, mężczyźni w wieku 65 lat.",
+    "Składka emerytalna wynosi 19,52% wynagrodzenia brutto.",
+    "System emerytalny w Polsce działa w oparciu o zasadę zdefiniowanej składki.",
+    "Minimalna emerytura w 2024 roku wynosi 1,588.44 zł brutto.",
+    "Każdy dodatkowy rok pracy może zwiększyć emeryturę nawet o 8-10%.",
+    "W 2023 roku średni okres pobierania emerytury wynosił około 22 lata.",
+    "Kobiety otrzymują średnio o 25% niższe emerytury niż mężczyźni.",
+    "Prognoza demograficzna wskazuje na wzrost liczby emerytów do 2040 roku.",
+    "System emerytalny składa się z I filaru (ZUS) i opcjonalnego III filaru (PPK, IKE).",
+    "Średni wiek przejścia na emeryturę w Polsce to 61 lat.",
+    "Emerytura minimalna jest waloryzowana co roku wraz z inflacją.",
+    "Składka emerytalna jest dzielona między ubezpieczonego (9,76%) i pracodawcę (9,76%).",
+    "ZUS wypłaca miesięcznie około 9 milionów emerytur i rent.",
+    "Emerytury są indeksowane dwa razy w roku - w marcu i wrześniu."
+]
+
+PENSION_GROUPS = [
+    {
+        "name": "Poniżej minimalnej",
+        "description": "Emerytury poniżej minimalnej kwoty",
+        "average_amount": 1200,
+        "percentage": 15,
+        "color": "#F05E5E",
+        "detailed_info": "Głównie osoby z krótkimi okresami składkowymi lub niskimi zarobkami. ZUS dopłaca do minimalnej emerytury."
+    },
+    {
+        "name": "Minimalna - 2000 zł",
+        "description": "Emerytury w przedziale minimalnym",
+        "average_amount": 1600,
+        "percentage": 25,
+        "color": "#FFB34F",
+        "detailed_info": "Osoby pracujące za najniższą krajową lub z przerwami w karierze zawodowej."
+    },
+    {
+        "name": "2000 - 3500 zł",
+        "description": "Średnie emerytury pracowników",
+        "average_amount": 2750,
+        "percentage": 35,
+        "color": "#00993F",
+        "detailed_info": "Największa grupa emerytów - osoby ze średnimi zarobkami i regularną aktywnością zawodową."
+    },
+    {
+        "name": "3500 - 5000 zł",
+        "description": "Emerytury wyższe",
+        "average_amount": 4250,
+        "percentage": 20,
+        "color": "#3F84D2",
+        "detailed_info": "Osoby z długim stażem pracy i ponadprzeciętnymi zarobkami, specjaliści, kierownicy średniego szczebla."
+    },
+    {
+        "name": "Powyżej 5000 zł",
+        "description": "Najwyższe emerytury",
+        "average_amount": 6500,
+        "percentage": 5,
+        "color": "#00416E",
+        "detailed_info": "Kadra kierownicza, specjaliści z bardzo wysokimi zarobkami, osoby z maksymalnym okresem składkowym."
+    }
+]
+
+HISTORICAL_DATA = {
+    "years": [2020, 2021, 2022, 2023, 2024],
+    "average_salaries": [4500, 4650, 4800, 4950, 5100],
+    "inflation_rates": [2.8, 3.2, 2.5, 3.1, 2.9],
+    "pension_fund_growth": [1.5, 2.1, 1.8, 2.3, 1.9]
+}
+
+# Static endpoints are encoded once; call .update(...) if their data changes
+dashboard_response = StaticJSON(DASHBOARD_DATA)
+pension_groups_response = StaticJSON(PENSION_GROUPS)
+historical_data_response = StaticJSON(HISTORICAL_DATA)
+random_fact_table = RandomFactTable(PENSION_FACTS)
+
 @api_bp.route('/dashboard', methods=['GET'])
 def get_dashboard_data():
     """Get basic dashboard data including average pensions and facts"""
-    try:
-        # Mock data - in production, this would come from ZUS/GUS/NBP data sources
-        dashboard_data = {
-            'average_pensions': {
-                'general': 2500.00,
-                'men': 2800.00,
-                'women': 2200.00,
-                'by_voivodeship': {
-                    'śląskie': 2900.00,
-                    'mazowieckie': 2700.00,
-                    'małopolskie': 2400.00
-                }
-            },
-            'did_you_know': [
-                "Najwyższa emerytura w Polsce jest wypłacana mieszkańcowi województwa śląskiego i wynosi 15 000 PLN",
-                "Średni czas spędzony na zwolnieniu lekarskim w Polsce to 14 dni w roku",
-                "Wysokość emerytury zależy od 80% najlepszych lat pracy"
-            ],
-        }
-
-        return jsonify(dashboard_data)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return dashboard_response.response()
 
 @api_bp.route('/simulate', methods=['POST'])
 def simulate_pension():
@@ -56,7 +147,7 @@ def simulate_pension():
 
         # Use pension calculator
         calculator = PensionCalculator()
-        result = calculator.calculate_pension(data)
+        result = calculator.calculate_pension_cached(data)
 
         # Update simulation with results
         db.update_simulation(simulation_id, result, 'completed')
@@ -69,6 +160,276 @@ def simulate_pension():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/simulate-batch', methods=['POST'])
+def simulate_batch():
+    """
+    Simulate many people at once. Accepts NDJSON (one input per line, streamed)
+    or a JSON array and streams back one NDJSON line per input, in input order.
+    """
+    try:
+        if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+            rows = _ndjson_rows(request.stream)
+        else:
+            data = request.get_json(silent=True)
+            if not isinstance(data, list):
+                return jsonify({'error': 'Expected a JSON array or an NDJSON body'}), 400
+            rows = iter(data)
+
+        calculator = PensionCalculator()
+        db = get_db()
+        return Response(stream_with_context(_simulate_batch_lines(rows, calculator, db)),
+                        mimetype='application/x-ndjson')
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _ndjson_rows(stream):
+    """Parse NDJSON lines lazily; malformed lines become ValueError placeholders"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f'Invalid JSON: {str(e)}')
+
+def _simulate_batch_lines(rows, calculator, db):
+    """Validate, calculate and persist rows chunk by chunk, yielding NDJSON result lines"""
+    index = 0
+    while True:
+        chunk = list(islice(rows, BATCH_CHUNK_SIZE))
+        if not chunk:
+            break
+
+        with batch_chunk_duration.time(path='simulate-batch'):
+            lines = [None] * len(chunk)
+            valid = []
+            for offset, row in enumerate(chunk):
+                try:
+                    if isinstance(row, Exception):
+                        raise row
+                    valid.append((offset, PensionInput.from_mapping(row)))
+                except (ValueError, TypeError, AttributeError) as e:
+                    lines[offset] = {'index': index + offset, 'error': str(e)}
+
+            inputs = [pension_input for _, pension_input in valid]
+            results = calculator.calculate_many(inputs) if inputs else []
+            try:
+                simulation_ids = db.create_simulations_bulk([
+                    {
+                        'input_data': pension_input.as_dict(),
+                        'results': result,
+                        'status': 'failed' if 'error' in result else 'completed'
+                    }
+                    for pension_input, result in zip(inputs, results)
+                ])
+            except Exception as db_error:
+                print(f"❌ Database error: {str(db_error)}")
+                simulation_ids = [None] * len(inputs)
+
+            for (offset, _), result, simulation_id in zip(valid, results, simulation_ids):
+                line = {'index': index + offset, 'simulation_id': simulation_id}
+                if 'error' in result:
+                    line['error'] = result['error']
+                else:
+                    line['results'] = result
+                lines[offset] = line
+            batch_rows.inc(len(valid), path='simulate-batch', outcome='calculated')
+            batch_rows.inc(len(chunk) - len(valid), path='simulate-batch', outcome='invalid')
+
+        yield ''.join(json.dumps(line) + '\n' for line in lines)
+        index += len(chunk)
+
+@api_bp.route('/simulate-stochastic', methods=['POST'])
+def simulate_pension_stochastic():
+    """Monte Carlo pension projection with P10/P50/P90 bands"""
+    try:
+        data = request.get_json()
+
+        # Validate required fields
+        required_fields = ['age', 'sex', 'gross_salary', 'work_start_year']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        n_paths = int(data.get('n_paths', 10000))
+        if not 1 <= n_paths <= MAX_STOCHASTIC_PATHS:
+            return jsonify({'error': f'n_paths must be between 1 and {MAX_STOCHASTIC_PATHS}'}), 400
+
+        calculator = PensionCalculator()
+        result = calculator.simulate_stochastic(data, n_paths=n_paths, seed=data.get('seed'))
+        if 'error' in result:
+            return jsonify(result), 400
+
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/sensitivity-grid', methods=['POST'])
+def sensitivity_grid():
+    """Pension surface over retirement year x salary change for the results page sliders"""
+    try:
+        data = request.get_json()
+
+        # Validate required fields
+        required_fields = ['age', 'sex', 'gross_salary', 'work_start_year']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        try:
+            year_from = int(data.get('work_end_year_from', int(data['work_start_year']) + 25))
+            year_to = int(data.get('work_end_year_to', year_from + 30))
+            year_step = int(data.get('work_end_year_step', 1))
+            salary_change_from = float(data.get('salary_change_from', -0.5))
+            salary_change_to = float(data.get('salary_change_to', 0.5))
+            salary_steps = int(data.get('salary_steps', 11))
+        except (ValueError, TypeError) as conversion_error:
+            return jsonify({'error': f'Invalid data format: {str(conversion_error)}'}), 400
+
+        if year_step < 1 or year_to < year_from or salary_steps < 1 or salary_change_from <= -1:
+            return jsonify({'error': 'Invalid grid ranges'}), 400
+
+        work_end_years = np.arange(year_from, year_to + 1, year_step)
+        salary_multipliers = 1 + np.linspace(salary_change_from, salary_change_to, salary_steps)
+        if work_end_years.size * salary_multipliers.size > MAX_GRID_CELLS:
+            return jsonify({'error': f'Grid too large (max {MAX_GRID_CELLS} cells)'}), 400
+
+        calculator = PensionCalculator()
+        result = calculator.calculate_sensitivity_grid(data, work_end_years, salary_multipliers)
+        if 'error' in result:
+            return jsonify(result), 400
+
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/solve-target', methods=['POST'])
+def solve_target_pension():
+    """
+    Required gross salary and earliest retirement year for a target pension.
+    Accepts one person with target_amount, or {"people": [...]} for a batch.
+    """
+    try:
+        data = request.get_json()
+        calculator = PensionCalculator()
+
+        if 'people' in data:
+            people = pd.DataFrame(data['people'])
+            required_fields = ['age', 'sex', 'gross_salary', 'work_start_year', 'target_amount']
+            for field in required_fields:
+                if field not in people:
+                    return jsonify({'error': f'Missing required field: {field}'}), 400
+
+            salaries = calculator.solve_required_salary(people)
+            years = calculator.solve_retirement_year(people)
+            return jsonify({
+                'required_gross_salary': [None if np.isnan(v) else round(float(v), 2) for v in salaries],
+                'required_work_end_year': [None if np.isnan(v) else int(v) for v in years]
+            })
+
+        required_fields = ['age', 'sex', 'gross_salary', 'work_start_year', 'target_amount']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        result = calculator.solve_target_pension(data, float(data['target_amount']))
+        if 'error' in result:
+            return jsonify(result), 400
+
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/liability-forecast', methods=['POST'])
+def liability_forecast():
+    """Yearly pension outlay and contribution inflow of {"people": [...]} (optional first_year, last_year)"""
+    try:
+        data = request.get_json()
+        if not data.get('people'):
+            return jsonify({'error': 'Missing required field: people'}), 400
+
+        people = pd.DataFrame(data['people'])
+        required_fields = ['age', 'sex', 'gross_salary', 'work_start_year']
+        for field in required_fields:
+            if field not in people:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        calculator = PensionCalculator()
+        result = calculator.forecast_liabilities(people, data.get('first_year'), data.get('last_year'))
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/deferral-curve', methods=['POST'])
+def deferral_curve():
+    """Deferred pension for every month of deferral (or the given horizons_months)"""
+    try:
+        data = request.get_json()
+
+        # Validate required fields
+        required_fields = ['age', 'sex', 'gross_salary', 'work_start_year']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        calculator = PensionCalculator()
+        result = calculator.calculate_deferral_curve(data, data.get('horizons_months'))
+        if 'error' in result:
+            return jsonify(result), 400
+
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/calculation-session', methods=['POST'])
+def create_calculation_session():
+    """Start an editable calculation; later edits go to PATCH /calculation-session/<id>"""
+    try:
+        data = request.get_json()
+
+        # Validate required fields
+        required_fields = ['age', 'sex', 'gross_salary', 'work_start_year']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        session = CalculationSession(data)
+        if 'error' in session.result:
+            return jsonify(session.result), 400
+
+        session_id = uuid.uuid4().hex
+        calculation_sessions.set(session_id, session)
+        return jsonify({'session_id': session_id, 'result': session.result})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/calculation-session/<session_id>', methods=['PATCH'])
+def update_calculation_session(session_id):
+    """Recalculate a session after some input fields changed"""
+    try:
+        found, session = calculation_sessions.get(session_id)
+        if not found:
+            return jsonify({'error': 'Calculation session not found'}), 404
+
+        result = session.update(request.get_json() or {})
+        if 'error' in result:
+            return jsonify(result), 400
+
+        return jsonify({'session_id': session_id, 'result': result})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/simulation/<int:simulation_id>', methods=['GET'])
 def get_simulation(simulation_id):
     """Get simulation results by ID"""
@@ -84,7 +445,7 @@ def get_simulation(simulation_id):
 
 @api_bp.route('/dashboard-advanced', methods=['POST'])
 def advanced_dashboard():
-    """Advanced dashboard for detailed analysis"""
+    """Advanced dashboard for detailed analysis (queued as a background job unless ?sync=1)"""
     try:
         data = request.get_json()
         db = get_db()
@@ -98,31 +459,106 @@ def advanced_dashboard():
         if not simulation:
             return jsonify({'error': 'Simulation not found'}), 404
 
-        # Advanced calculations
-        calculator = PensionCalculator()
-        advanced_results = calculator.get_advanced_analysis(simulation['input_data'])
+        # An uploaded salary history replaces the one stored with the simulation
+        input_data = simulation['input_data']
+        if 'historical_salaries' in data:
+            input_data = dict(input_data, historical_salaries=data['historical_salaries'])
 
-        return jsonify(advanced_results)
+        if _is_sync_request():
+            return jsonify(_run_advanced_analysis(input_data, data.get('scenarios')))
+
+        job = job_queue.submit('advanced_analysis', _run_advanced_analysis, input_data, data.get('scenarios'))
+        return _job_accepted(job)
+    except JobQueueFull as e:
+        return _queue_full(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _run_advanced_analysis(input_data, scenarios):
+    """Advanced calculations, optionally with client-defined scenarios"""
+    calculator = PensionCalculator()
+    return calculator.get_advanced_analysis(input_data, scenarios=scenarios)
+
 @api_bp.route('/report/<int:simulation_id>', methods=['GET'])
 def download_report(simulation_id):
-    """Generate and download pension report"""
+    """Generate pension report (queued as a background job unless ?sync=1)"""
     try:
         db = get_db()
         simulation = db.get_simulation(simulation_id)
         if not simulation:
             return jsonify({'error': 'Simulation not found'}), 404
 
-        # Generate report
-        report_path = generate_report(simulation)
+        if _is_sync_request():
+            return send_file(
+                generate_report(simulation),
+                as_attachment=True,
+                download_name=f'pension_report_{simulation_id}.pdf'
+            )
+
+        job = job_queue.submit('report', _run_report, simulation, cleanup=_remove_report)
+        return _job_accepted(job)
+    except JobQueueFull as e:
+        return _queue_full(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        return send_file(
-            report_path,
-            as_attachment=True,
-            download_name=f'pension_report_{simulation_id}.pdf'
-        )
+def _run_report(simulation):
+    return {
+        'path': generate_report(simulation),
+        'download_name': f'pension_report_{simulation["id"]}.pdf'
+    }
+
+def _remove_report(result):
+    """Delete an expired job's report file"""
+    if os.path.exists(result['path']):
+        os.remove(result['path'])
+
+def _is_sync_request():
+    return request.args.get('sync', '').lower() in ('1', 'true', 'yes')
+
+def _job_accepted(job):
+    """202 response pointing to the job status"""
+    status_url = f'/api/jobs/{job.id}'
+    response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url})
+    response.headers['Location'] = status_url
+    return response, 202
+
+def _queue_full(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Status of a background job"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    status = job.to_dict()
+    if job.status == 'completed':
+        status['result_url'] = f'/api/jobs/{job.id}/result'
+    return jsonify(status)
+
+@api_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Result of a finished background job (JSON analysis or the PDF report)"""
+    try:
+        job = job_queue.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.status == 'failed':
+            return jsonify({'error': job.error}), 500
+        if job.status != 'completed':
+            return jsonify(job.to_dict()), 409
+
+        if job.kind == 'report':
+            return send_file(
+                job.result['path'],
+                as_attachment=True,
+                download_name=job.result['download_name']
+            )
+        return jsonify(job.result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -167,78 +603,12 @@ def get_admin_reports():
 @api_bp.route('/random-fact', methods=['GET'])
 def get_random_fact():
     """Zwraca losową ciekawostkę o emeryturach"""
-    facts = [
-        "Średnia emerytura w Polsce wynosi około 2,800 zł brutto.",
-        "Kobiety przechodzą na emeryturę w wieku 60 lat, mężczyźni w wieku 65 lat.",
-        "Składka emerytalna wynosi 19,52% wynagrodzenia brutto.",
-        "System emerytalny w Polsce działa w oparciu o zasadę zdefiniowanej składki.",
-        "Minimalna emerytura w 2024 roku wynosi 1,588.44 zł brutto.",
-        "Każdy dodatkowy rok pracy może zwiększyć emeryturę nawet o 8-10%.",
-        "W 2023 roku średni okres pobierania emerytury wynosił około 22 lata.",
-        "Kobiety otrzymują średnio o 25% niższe emerytury niż mężczyźni.",
-        "Prognoza demograficzna wskazuje na wzrost liczby emerytów do 2040 roku.",
-        "System emerytalny składa się z I filaru (ZUS) i opcjonalnego III filaru (PPK, IKE).",
-        "Średni wiek przejścia na emeryturę w Polsce to 61 lat.",
-        "Emerytura minimalna jest waloryzowana co roku wraz z inflacją.",
-        "Składka emerytalna jest dzielona między ubezpieczonego (9,76%) i pracodawcę (9,76%).",
-        "ZUS wypłaca miesięcznie około 9 milionów emerytur i rent.",
-        "Emerytury są indeksowane dwa razy w roku - w marcu i wrześniu."
-    ]
-    
-    random_fact = random.choice(facts)
-    
-    return jsonify({
-        "fact": random_fact,
-        "timestamp": datetime.now().isoformat()
-    })
+    return random_fact_table.response()
 
 @api_bp.route('/pension-groups', methods=['GET'])
 def get_pension_groups():
     """Zwraca grupy emerytalne do wykresów"""
-    groups = [
-        {
-            "name": "Poniżej minimalnej",
-            "description": "Emerytury poniżej minimalnej kwoty",
-            "average_amount": 1200,
-            "percentage": 15,
-            "color": "#F05E5E",
-            "detailed_info": "Głównie osoby z krótkimi okresami składkowymi lub niskimi zarobkami. ZUS dopłaca do minimalnej emerytury."
-        },
-        {
-            "name": "Minimalna - 2000 zł",
-            "description": "Emerytury w przedziale minimalnym",
-            "average_amount": 1600,
-            "percentage": 25,
-            "color": "#FFB34F",
-            "detailed_info": "Osoby pracujące za najniższą krajową lub z przerwami w karierze zawodowej."
-        },
-        {
-            "name": "2000 - 3500 zł",
-            "description": "Średnie emerytury pracowników",
-            "average_amount": 2750,
-            "percentage": 35,
-            "color": "#00993F",
-            "detailed_info": "Największa grupa emerytów - osoby ze średnimi zarobkami i regularną aktywnością zawodową."
-        },
-        {
-            "name": "3500 - 5000 zł",
-            "description": "Emerytury wyższe",
-            "average_amount": 4250,
-            "percentage": 20,
-            "color": "#3F84D2",
-            "detailed_info": "Osoby z długim stażem pracy i ponadprzeciętnymi zarobkami, specjaliści, kierownicy średniego szczebla."
-        },
-        {
-            "name": "Powyżej 5000 zł",
-            "description": "Najwyższe emerytury",
-            "average_amount": 6500,
-            "percentage": 5,
-            "color": "#00416E",
-            "detailed_info": "Kadra kierownicza, specjaliści z bardzo wysokimi zarobkami, osoby z maksymalnym okresem składkowym."
-        }
-    ]
-    
-    return jsonify(groups)
+    return pension_groups_response.response()
 
 @api_bp.route('/test-calculation', methods=['POST'])
 def test_calculation():
@@ -279,118 +649,52 @@ def test_calculation():
 
 @api_bp.route('/calculate-pension', methods=['POST'])
 def calculate_pension():
-    """Endpoint zgodny z frontendem - mapuje na istniejący /simulate"""
+    """Endpoint zgodny z frontendem - przyjmuje format camelCase i zwraca format frontendu"""
     try:
         data = request.get_json()
-        
-        # Mapowanie z frontend format (camelCase) na backend format (snake_case)
-        gender_mapping = {'male': 'm', 'female': 'f'}  # Mapowanie gender format
-        
-        try:
-            mapped_data = {
-                'age': int(data.get('age')) if data.get('age') is not None else None,
-                'sex': gender_mapping.get(data.get('gender'), data.get('gender')),  # Mapowanie male/female -> m/f
-                'gross_salary': float(data.get('grossSalary')) if data.get('grossSalary') is not None else None,
-                'work_start_year': int(data.get('workStartYear')) if data.get('workStartYear') is not None else None,
-                'work_end_year': int(data.get('workEndYear')) if data.get('workEndYear') and data.get('workEndYear') != '' else None,
-                'zus_funds': float(data.get('currentFunds', 0)),  # Backend oczekuje 'zus_funds'
-                'include_sick_leave': bool(data.get('sickLeaveImpact', False)),  # Backend oczekuje 'include_sick_leave'
-                'expected_pension': float(data.get('expectedPension')) if data.get('expectedPension') else None,
-                'postal_code': data.get('postalCode')  # Poprawiono: camelCase z frontend
-            }
-        except (ValueError, TypeError) as conversion_error:
-            print(f"❌ Data conversion error: {str(conversion_error)}")
-            return jsonify({'error': f'Invalid data format: {str(conversion_error)}'}), 400
-        
-        # DEBUG: Loguj zmapowane dane
-        print("🔍 DEBUG - Mapped data for backend:")
-        for key, value in mapped_data.items():
-            print(f"  {key}: {value} (type: {type(value)})")
-        
-        # Validate required fields
-        required_fields = ['age', 'sex', 'gross_salary', 'work_start_year']
-        for field in required_fields:
-            if field not in mapped_data or mapped_data[field] is None or mapped_data[field] == '':
-                print(f"❌ Validation failed for field: {field} = {mapped_data.get(field)}")
-                return jsonify({'error': f'Missing required field: {field}'}), 400
 
+        # Jedna walidacja i konwersja formatu frontendu (camelCase, male/female)
         try:
-            db = get_db()
-            simulation_id = db.create_simulation(mapped_data)
-        except Exception as db_error:
-            print(f"❌ Database error: {str(db_error)}")
-            import traceback
-            print(f"❌ Database traceback: {traceback.format_exc()}")
-            # Continue without database for now
-            simulation_id = None
+            pension_input = PensionInput.from_frontend(data)
+        except ValueError as validation_error:
+            print(f"❌ Validation failed: {str(validation_error)}")
+            return jsonify({'error': str(validation_error)}), 400
 
         try:
             calculator = PensionCalculator()
-            result = calculator.calculate_pension(mapped_data)
-            
-            # DEBUG: Sprawdź czy są błędy w kalkulatorze
-            if isinstance(result, dict) and 'error' in result:
-                print(f"❌ Backend calculator error: {result['error']}")
-                return jsonify({'error': f"Calculator error: {result['error']}"}), 500
-            
-            # DEBUG: Loguj wynik kalkulatora
-            print("🔍 DEBUG - Backend calculator result:")
-            print(f"  actual_amount: {result.get('actual_amount')}")
-            print(f"  real_amount: {result.get('real_amount')}")
-            print(f"  replacement_rate: {result.get('replacement_rate')}")
-            print(f"  deferral_benefits keys: {result.get('deferral_benefits', {}).keys()}")
-            print(f"  full result keys: {result.keys()}")
-            print(f"  full result: {result}")
-
-            if simulation_id:
-                try:
-                    db.update_simulation(simulation_id, result, 'completed')
-                except Exception as db_update_error:
-                    print(f"⚠️ Database update error (continuing anyway): {str(db_update_error)}")
-            
+            result = calculator.calculate_cached(pension_input)
+        except InsufficientWorkYearsError as calc_error:
+            print(f"❌ Backend calculator error: {str(calc_error)}")
+            _persist_simulation(pension_input, {'error': str(calc_error)}, 'failed')
+            return jsonify({'error': f"Calculator error: {str(calc_error)}"}), 500
         except Exception as calc_error:
             print(f"❌ Exception in calculator: {str(calc_error)}")
-            print(f"❌ Calculator exception type: {type(calc_error)}")
             import traceback
             print(f"❌ Full traceback: {traceback.format_exc()}")
             return jsonify({'error': f"Calculator exception: {str(calc_error)}"}), 500
 
-        # Mapowanie z backend format na frontend format
-        frontend_result = {
-            'real_amount': result.get('actual_amount', 0),
-            'inflation_adjusted_amount': result.get('real_amount', 0),
-            'replacement_rate': result.get('replacement_rate', 0),
-            'average_pension_comparison': result.get('average_pension_comparison', 0),  # Poprawiono nazewnictwo
-            'delayed_retirement_scenarios': {
-                'one_year': {
-                    'amount': result.get('deferral_benefits', {}).get('1_years', {}).get('actual_amount', 0),
-                    'increase': result.get('deferral_benefits', {}).get('1_years', {}).get('increase_percentage', 0)
-                },
-                'two_years': {
-                    'amount': result.get('deferral_benefits', {}).get('2_years', {}).get('actual_amount', 0),
-                    'increase': result.get('deferral_benefits', {}).get('2_years', {}).get('increase_percentage', 0)
-                },
-                'five_years': {
-                    'amount': result.get('deferral_benefits', {}).get('5_years', {}).get('actual_amount', 0),
-                    'increase': result.get('deferral_benefits', {}).get('5_years', {}).get('increase_percentage', 0)
-                }
-            },
-            'funds_growth_timeline': result.get('capital_accumulation_projection', [])  # Poprawiono nazewnictwo
-        }
-        
-        if 'sick_leave_impact' in result:
-            frontend_result['sick_leave_impact'] = {
-                'with_sick_leave': result['sick_leave_impact'].get('with_sick_leave', 0),
-                'without_sick_leave': result['sick_leave_impact'].get('without_sick_leave', 0),
-                'difference': result['sick_leave_impact'].get('difference', 0),
-                'percentage_impact': result['sick_leave_impact'].get('percentage_impact', 0)
-            }
+        # One complete record, stored by the write-behind writer in a group commit
+        _persist_simulation(pension_input, result.to_dict(), 'completed')
+
+        frontend_result = result.to_frontend_dict()
+        # Month-by-month deferral chart, built from the cached result above
+        frontend_result['deferral_curve'] = calculator.calculate_deferral_curve(pension_input).get('curve', [])
+
+        # How many more years of work the expected pension needs (frontend: requiredWorkExtension)
+        if pension_input.expected_pension and pension_input.expected_pension > result.actual_amount:
+            target = calculator.solve_target_pension(pension_input.as_dict(), pension_input.expected_pension)
+            if target.get('required_work_extension') is not None:
+                frontend_result['required_work_extension'] = target['required_work_extension']
 
         return jsonify(frontend_result)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _persist_simulation(pension_input, results, status):
+    """Queue the simulation record (records that cannot be stored are counted in /api/admin/write-behind)"""
+    simulation_writer.submit({'input_data': pension_input.as_dict(), 'results': results, 'status': status})
+
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """Sprawdza status backend"""
@@ -427,12 +731,7 @@ def get_regional_stats():
 @api_bp.route('/historical-data', methods=['GET'])
 def get_historical_data():
     """Zwraca dane historyczne"""
-    return jsonify({
-        "years": [2020, 2021, 2022, 2023, 2024],
-        "average_salaries": [4500, 4650, 4800, 4950, 5100],
-        "inflation_rates": [2.8, 3.2, 2.5, 3.1, 2.9],
-        "pension_fund_growth": [1.5, 2.1, 1.8, 2.3, 1.9]
-    })
+    return historical_data_response.response()
 
 @api_bp.route('/log-usage', methods=['POST'])
 def log_usage():
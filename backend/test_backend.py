@@ -81,7 +81,8 @@ def test_pension_calculator():
         result = calculator.calculate_pension(sample_data)
 
         if 'error' not in result:
-            print("✓ Pension calculation successful"            print(f"  - Actual amount: {result.get('actual_amount', 0)} PLN")
+            print("✓ Pension calculation successful")
+            print(f"  - Actual amount: {result.get('actual_amount', 0)} PLN")
             print(f"  - Real amount: {result.get('real_amount', 0)} PLN")
             print(f"  - Replacement rate: {result.get('replacement_rate', 0)}%")
         else:
@@ -93,6 +94,155 @@ def test_pension_calculator():
         print(f"❌ Calculator test error: {e}")
         return False
 
+
+def test_simulate_batch_endpoint(tmp_path, monkeypatch):
+    """NDJSON batch upload streams one result line per input and persists the results"""
+    import json
+    from app import create_app
+    from database.factory import DatabaseFactory
+
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'batch.db'))
+    DatabaseFactory.reset()
+    try:
+        client = create_app().test_client()
+        rows = [
+            {'age': 35, 'sex': 'm', 'gross_salary': 6000, 'work_start_year': 2012},
+            {'age': 35, 'sex': 'm'},
+            {'age': 50, 'sex': 'f', 'gross_salary': 9000, 'work_start_year': 1999, 'zus_funds': 120000},
+        ]
+        body = '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n'
+        response = client.post('/api/simulate-batch', data=body, content_type='application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        assert [line['index'] for line in lines] == [0, 1, 2, 3]
+        assert 'error' in lines[1] and 'error' in lines[3]
+        stored = DatabaseFactory.get_repository().get_simulation(lines[2]['simulation_id'])
+        assert stored['results'] == lines[2]['results']
+        assert stored['input_data']['zus_funds'] == 120000
+    finally:
+        DatabaseFactory.reset()
+
+
+def test_advanced_dashboard_job(tmp_path, monkeypatch):
+    """Advanced analysis is queued as a job whose result matches the synchronous response"""
+    import time
+    from app import create_app
+    from database.factory import DatabaseFactory
+
+    monkeypatch.setenv('DB_PATH', str(tmp_path / 'jobs.db'))
+    DatabaseFactory.reset()
+    try:
+        client = create_app().test_client()
+        simulation_id = DatabaseFactory.get_repository().create_simulation(
+            {'age': 35, 'sex': 'm', 'gross_salary': 6000, 'work_start_year': 2012}
+        )
+
+        response = client.post('/api/dashboard-advanced', json={'simulation_id': simulation_id})
+        assert response.status_code == 202
+        job_url = response.headers['Location']
+
+        for _ in range(200):
+            status = client.get(job_url).get_json()
+            if status['status'] in ('completed', 'failed'):
+                break
+            time.sleep(0.05)
+        assert status['status'] == 'completed'
+
+        result = client.get(status['result_url']).get_json()
+        sync = client.post('/api/dashboard-advanced?sync=1', json={'simulation_id': simulation_id}).get_json()
+        assert result == sync
+        assert client.get('/api/jobs/unknown').status_code == 404
+    finally:
+        DatabaseFactory.reset()
+
+
+def test_static_endpoints_conditional():
+    """Static endpoints serve pre-encoded bodies with ETags and answer 304 when unchanged"""
+    import json
+    from app import create_app
+    from routes.api import PENSION_FACTS
+
+    client = create_app().test_client()
+    response = client.get('/api/pension-groups')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 5
+    etag = response.headers['ETag']
+
+    cached = client.get('/api/pension-groups', headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.data == b''
+    assert client.get('/api/dashboard', headers={'If-None-Match': etag}).status_code == 200
+
+    fact = json.loads(client.get('/api/random-fact').data)
+    assert fact['fact'] in PENSION_FACTS and fact['timestamp']
+
+
+def test_metrics_endpoint():
+    """Requests and calculator calls show up in the Prometheus output"""
+    from app import create_app
+    from utils.metrics import http_requests
+
+    client = create_app().test_client()
+    before = http_requests.value(method='GET', route='/api/historical-data', status=200)
+    client.get('/api/historical-data')
+    client.post('/api/deferral-curve', json={'age': 40, 'sex': 'f', 'gross_salary': 7000, 'work_start_year': 2008})
+    assert http_requests.value(method='GET', route='/api/historical-data', status=200) == before + 1
+
+    response = client.get('/metrics')
+    assert response.content_type.startswith('text/plain')
+    text = response.get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/historical-data",le="+Inf"}' in text
+    assert 'calculator_duration_seconds_count{operation="calculate_deferral_curve"}' in text
+
+
+def test_parameter_paths_reload_rejects_other_files(monkeypatch):
+    """The reload endpoint only reads the configured PARAMETER_PATHS_FILE"""
+    from app import create_app
+
+    monkeypatch.delenv('PARAMETER_PATHS_FILE', raising=False)
+    client = create_app().test_client()
+    response = client.post('/api/admin/parameter-paths/reload', json={'file': '/etc/passwd'})
+    assert response.status_code == 400
+    assert 'passwd' not in response.get_data(as_text=True)
+
+
+
+def test_calculation_session_expires_after_inactivity(monkeypatch):
+    """A session in use stays alive past 30 minutes and expires 30 minutes after its last use"""
+    import utils.cache
+    from app import create_app
+
+    now = [1000.0]
+    monkeypatch.setattr(utils.cache.time, 'monotonic', lambda: now[0])
+    client = create_app().test_client()
+    person = {'age': 30, 'sex': 'f', 'gross_salary': 6000, 'work_start_year': 2018}
+    session_id = client.post('/api/calculation-session', json=person).get_json()['session_id']
+
+    for salary in [6500, 7000, 7500]:
+        now[0] += 20 * 60
+        response = client.patch(f'/api/calculation-session/{session_id}', json={'gross_salary': salary})
+        assert response.status_code == 200
+
+    now[0] += 30 * 60
+    response = client.patch(f'/api/calculation-session/{session_id}', json={'gross_salary': 8000})
+    assert response.status_code == 404
+
+
+def test_job_queue_keeps_a_bounded_number_of_finished_jobs():
+    """Beyond max_finished the oldest finished jobs are dropped and their results cleaned up"""
+    from utils.jobs import JobQueue
+
+    queue = JobQueue(max_workers=1, max_finished=2)
+    cleaned = []
+    jobs = [queue.submit('test', lambda i=i: {'value': i}, cleanup=cleaned.append) for i in range(3)]
+    queue.shutdown(wait=True)
+
+    assert queue.get(jobs[0].id) is None
+    assert cleaned == [{'value': 0}]
+    assert [queue.get(job.id).result for job in jobs[1:]] == [{'value': 1}, {'value': 2}]
+    assert queue.stats()['jobs'] == {'completed': 2}
+    assert queue.stats()['evicted'] == 1
+
 if __name__ == "__main__":
     print("Pension Simulator Backend - Test Suite")
     print("=" * 50)
@@ -0,0 +1,584 @@
+"""
+Tests for the vectorized pension calculator paths
+"""
+
+import sys
+import os
+
+# Add current directory to Python path for imports
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import numpy as np
+import pandas as pd
+import pytest
+from models.pension_calculator import PensionCalculator
+from models.records import PensionInput
+
+
+SAMPLE_PEOPLE = [
+    {'age': 35, 'sex': 'M', 'gross_salary': 5000, 'work_start_year': 2010, 'work_end_year': 2045},
+    {'age': 30, 'sex': 'f', 'gross_salary': 7200.5, 'work_start_year': 2018, 'work_end_year': None,
+     'zus_funds': 15000, 'include_sick_leave': True},
+    {'age': 22, 'sex': 'm', 'gross_salary': 4300, 'work_start_year': 2030, 'work_end_year': 2070,
+     'zus_funds': 0, 'include_sick_leave': True},
+    {'age': 50, 'sex': 'f', 'gross_salary': 9000, 'work_start_year': 1995, 'work_end_year': 2036},
+    {'age': 60, 'sex': 'm', 'gross_salary': 3000, 'work_start_year': 2015, 'work_end_year': 2030},
+]
+
+
+def test_batch_matches_single():
+    """calculate_pension_batch returns the same numbers as calculate_pension"""
+    calculator = PensionCalculator()
+    frame = pd.DataFrame(SAMPLE_PEOPLE)
+    batch = calculator.calculate_pension_batch(frame)
+
+    for i, person in enumerate(SAMPLE_PEOPLE):
+        single = calculator.calculate_pension(person)
+        row = batch.iloc[i]
+        if 'error' in single:
+            assert not row['valid']
+            assert np.isnan(row['actual_amount'])
+            continue
+
+        assert row['valid']
+        for field in ['actual_amount', 'real_amount', 'replacement_rate', 'accumulated_capital']:
+            assert abs(row[field] - single[field]) <= 0.01, field
+        assert row['retirement_year'] == single['retirement_year']
+        assert row['years_of_work'] == single['years_of_work']
+        for key, benefits in single['deferral_benefits'].items():
+            years = key.split('_')[0]
+            assert abs(row[f'deferral_{years}_years_actual_amount'] - benefits['actual_amount']) <= 0.01
+
+
+def test_batch_accepts_arrays():
+    """calculate_pension_batch works on plain NumPy columns"""
+    calculator = PensionCalculator()
+    n = 1000
+    rng = np.random.default_rng(0)
+    results = calculator.calculate_pension_batch({
+        'age': rng.integers(20, 50, n),
+        'sex': rng.choice(['m', 'f'], n),
+        'gross_salary': rng.uniform(3000, 15000, n),
+        'work_start_year': rng.integers(2000, 2025, n),
+    })
+
+    assert results['actual_amount'].shape == (n,)
+    assert np.all(results['actual_amount'][results['valid']] >= calculator.minimum_pension)
+
+
+def _reference_capital(calculator, salary, start_year, end_year, zus_funds, include_sick_leave, sex):
+    """Year-by-year capital accumulation the closed form must reproduce"""
+    capital = zus_funds
+    growth = 1 + calculator.average_salary_growth
+    factor = 1 - calculator._get_sick_leave_reduction(sex) if include_sick_leave else 1
+    for year in range(start_year, min(end_year, calculator.current_year)):
+        capital += salary * growth ** (calculator.current_year - year) * factor * calculator.contribution_rate
+    for year in range(max(start_year, calculator.current_year), end_year):
+        capital += salary * growth ** (year - start_year + 1) * factor * calculator.contribution_rate
+    return capital
+
+
+def test_closed_form_capital_matches_loop():
+    """_calculate_accumulated_capital agrees with the year-by-year sum"""
+    calculator = PensionCalculator()
+    now = calculator.current_year
+    cases = [
+        (5000, 2010, 2045, 0, False, 'm'),
+        (7200, now - 1, now + 40, 15000, True, 'f'),
+        (4300, now + 4, now + 44, 0, True, 'm'),
+        (9000, 1990, now - 2, 1000, False, 'f'),
+        (3000, now, now, 0, False, 'm'),
+    ]
+    for case in cases:
+        expected = _reference_capital(calculator, *case)
+        assert abs(calculator._calculate_accumulated_capital(*case) - expected) < 1e-6 * max(expected, 1)
+
+    calculator.average_salary_growth = 0.0
+    expected = _reference_capital(calculator, *cases[0])
+    assert abs(calculator._calculate_accumulated_capital(*cases[0]) - expected) < 1e-6
+
+
+def test_stochastic_projection():
+    """simulate_stochastic is seeded, ordered and collapses to the deterministic result"""
+    calculator = PensionCalculator()
+    person = {'age': 30, 'sex': 'f', 'gross_salary': 6000, 'work_start_year': 2018, 'zus_funds': 10000}
+
+    first = calculator.simulate_stochastic(person, n_paths=10000, seed=42)
+    second = calculator.simulate_stochastic(person, n_paths=10000, seed=42)
+    assert first == second
+    for field in ['actual_amount', 'real_amount', 'accumulated_capital']:
+        assert first[field]['p10'] <= first[field]['p50'] <= first[field]['p90']
+    assert first['capital_timeline'][-1]['year'] == first['retirement_year'] - 1
+
+    calculator.salary_growth_volatility = 0.0
+    calculator.inflation_volatility = 0.0
+    flat = calculator.simulate_stochastic(person, n_paths=10, seed=1)
+    deterministic = calculator.calculate_pension(person)
+    assert abs(flat['actual_amount']['p50'] - deterministic['actual_amount']) <= 0.01
+    assert abs(flat['real_amount']['p50'] - deterministic['real_amount']) <= 0.01
+
+
+def test_cached_calculation():
+    """calculate_pension_cached hits on equivalent input and misses after a parameter change"""
+    from utils.cache import LRUCache
+
+    cache = LRUCache(maxsize=2)
+    calculator = PensionCalculator()
+    person = {'age': 30, 'sex': 'M', 'gross_salary': 5000, 'work_start_year': 2020}
+
+    first = calculator.calculate_pension_cached(person, cache=cache)
+    again = calculator.calculate_pension_cached(dict(person, sex='m', gross_salary=5000.0), cache=cache)
+    assert again == first
+    assert cache.stats()['hits'] == 1
+
+    record = calculator.calculate_cached(PensionInput.from_mapping(person), cache=cache)
+    assert calculator.calculate_cached(PensionInput.from_mapping(person), cache=cache) is record
+    assert record.to_dict() == first
+
+    fingerprint = calculator.parameters_fingerprint()
+    assert calculator.parameters_fingerprint() == fingerprint
+    calculator.inflation_rate = 0.04
+    assert calculator.parameters_fingerprint() != fingerprint
+    changed = calculator.calculate_pension_cached(person, cache=cache)
+    assert changed['real_amount'] != first['real_amount']
+
+    calculator.calculate_pension_cached(dict(person, gross_salary=6000), cache=cache)
+    assert cache.stats()['evictions'] == 1
+
+    calculator.inflation_rate = 0.025
+    assert calculator.parameters_fingerprint() == fingerprint
+    calculator.parameter_paths = object()
+    assert calculator.parameters_fingerprint() != fingerprint
+
+
+def test_concurrent_identical_calculations_run_once():
+    """Concurrent cache misses and advanced analyses with equal input share one computation"""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from utils.cache import LRUCache
+
+    calculator = PensionCalculator()
+    person = {'age': 30, 'sex': 'm', 'gross_salary': 5000, 'work_start_year': 2020}
+    calls = []
+    release = threading.Event()
+
+    def slow(method):
+        def wrapper(*args, **kwargs):
+            calls.append(method.__name__)
+            release.wait(5)
+            return method(*args, **kwargs)
+        return wrapper
+
+    calculator.calculate = slow(calculator.calculate)
+    calculator._advanced_analysis = slow(calculator._advanced_analysis)
+    cache = LRUCache()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        records = [pool.submit(calculator.calculate_cached, PensionInput.from_mapping(person), cache) for _ in range(4)]
+        analyses = [pool.submit(calculator.get_advanced_analysis, dict(person)) for _ in range(4)]
+        threading.Timer(0.2, release.set).start()
+        records = [future.result() for future in records]
+        analyses = [future.result() for future in analyses]
+
+    assert calls.count('calculate') == 1 and calls.count('_advanced_analysis') == 1
+    assert all(record is records[0] for record in records)
+    assert all(analysis == analyses[0] for analysis in analyses)
+
+
+def test_sensitivity_grid():
+    """calculate_sensitivity_grid cells equal individual calculations"""
+    calculator = PensionCalculator()
+    person = {'age': 30, 'sex': 'm', 'gross_salary': 5000, 'work_start_year': 2020}
+    grid = calculator.calculate_sensitivity_grid(person, range(2040, 2071, 5), [0.5, 1.0, 1.5])
+
+    assert len(grid['actual_amount']) == 7 and len(grid['actual_amount'][0]) == 3
+    assert grid['actual_amount'][0][0] is None  # 20 years of work is below the minimum for men
+
+    single = calculator.calculate_pension(dict(person, work_end_year=2060, gross_salary=7500))
+    assert abs(grid['actual_amount'][4][2] - single['actual_amount']) <= 0.01
+    assert abs(grid['real_amount'][4][2] - single['real_amount']) <= 0.01
+
+    # Input is validated like calculate_pension
+    invalid = calculator.calculate_sensitivity_grid(dict(person, sex='male'), [2060], [1.0])
+    assert 'Invalid sex: male' in invalid['error']
+    assert 'Invalid sex: male' in calculator.calculate_pension(dict(person, sex='male'))['error']
+
+
+def test_scenarios_override_parameters():
+    """calculate_scenarios applies per-scenario input and parameter overrides"""
+    calculator = PensionCalculator()
+    person = {'age': 30, 'sex': 'f', 'gross_salary': 6000, 'work_start_year': 2018}
+    results = calculator.calculate_scenarios(person, {
+        'base': {},
+        'higher_salary_growth': {'salary_growth_multiplier': 1.5},
+        'high_inflation': {'inflation_rate': 0.05, 'work_end_year': 2060},
+        'too_short': {'work_end_year': 2030},
+    })
+
+    assert abs(results['base']['actual_amount'] - calculator.calculate_pension(person)['actual_amount']) <= 0.01
+    assert results['higher_salary_growth']['accumulated_capital'] > results['base']['accumulated_capital']
+    assert 'error' in results['too_short']
+
+    modified = PensionCalculator()
+    modified.inflation_rate = 0.05
+    expected = modified.calculate_pension(dict(person, work_end_year=2060))
+    assert abs(results['high_inflation']['real_amount'] - expected['real_amount']) <= 0.01
+
+    analysis = calculator.get_advanced_analysis(person)
+    scenarios = analysis['scenarios']
+    assert scenarios['higher_salary_growth']['accumulated_capital'] > scenarios['lower_salary_growth']['accumulated_capital']
+    assert 'with_sick_leave' in scenarios
+
+    # Parameters the batch path does not read, and reserved scenario names, are rejected
+    for overrides in ({'pension_indexation': 0.05}, {'growth_inflation_correlation': 0.1}, {'current_year': 2030}):
+        with pytest.raises(ValueError):
+            calculator.calculate_scenarios(person, {'scenario': overrides})
+    assert 'Reserved scenario name: base' in calculator.get_advanced_analysis(person, {'base': {'gross_salary': 1}})['error']
+    calculator.life_table = object()
+    with pytest.raises(ValueError):
+        calculator.calculate_scenarios(person, {'scenario': {'life_expectancy_men': 25}})
+
+
+def test_capital_timeline_matches_accumulated_capital():
+    """calculate_pension returns a yearly timeline ending at accumulated_capital"""
+    calculator = PensionCalculator()
+    person = {'age': 35, 'sex': 'm', 'gross_salary': 5000, 'work_start_year': 2010,
+              'work_end_year': 2045, 'zus_funds': 20000, 'include_sick_leave': True}
+    result = calculator.calculate_pension(person)
+    timeline = result['capital_accumulation_projection']
+
+    assert [entry['year'] for entry in timeline] == list(range(2010, 2045))
+    assert timeline[-1]['total_funds'] == result['accumulated_capital']
+    expected = calculator._calculate_accumulated_capital(5000, 2010, 2045, 20000, True, 'm')
+    assert abs(result['accumulated_capital'] - expected) <= 0.01
+    assert timeline[0]['age'] == 35 + 2010 - calculator.current_year
+
+
+def test_parameter_paths_projection():
+    """Year-varying parameter paths match a year-by-year calculation"""
+    from models.parameter_paths import ParameterPaths
+
+    calculator = PensionCalculator()
+    now = calculator.current_year
+    years = list(range(now - 20, now + 60))
+    growth = [0.02 + 0.0005 * i for i in range(len(years))]
+    inflation = [0.03 - 0.0002 * i for i in range(len(years))]
+
+    flat = ParameterPaths('flat', years, [calculator.average_salary_growth] * len(years),
+                          [calculator.inflation_rate] * len(years))
+    person = {'age': 35, 'sex': 'm', 'gross_salary': 5000, 'work_start_year': now - 15, 'work_end_year': now + 20}
+    expected = calculator.calculate_pension(person)
+    calculator.parameter_paths = flat
+    assert abs(calculator.calculate_pension(person)['accumulated_capital'] - expected['accumulated_capital']) <= 0.01
+    assert abs(calculator.calculate_pension(person)['real_amount'] - expected['real_amount']) <= 0.01
+
+    paths = ParameterPaths('varying', years, growth, inflation)
+    calculator.parameter_paths = paths
+    rate = dict(zip(years, growth))
+    start, end = person['work_start_year'], person['work_end_year']
+    capital = 0.0
+    for year in range(start, end):
+        factor = 1.0
+        if year < now:
+            for u in range(year + 1, now + 1):
+                factor *= 1 + rate[u]
+        else:
+            for u in range(start, year + 1):
+                factor *= 1 + rate[u]
+        capital += person['gross_salary'] * factor * calculator.contribution_rate
+
+    result = calculator.calculate_pension(person)
+    assert abs(result['accumulated_capital'] - capital) <= 0.01
+    batch = calculator.calculate_pension_batch(pd.DataFrame([person]))
+    assert abs(batch['accumulated_capital'][0] - capital) <= 0.01
+
+    # A scenario that sets a rate explicitly uses it flat, even when it equals the calculator value
+    scenarios = calculator.calculate_scenarios(
+        person, {'base': {}, 'explicit': {'average_salary_growth': calculator.average_salary_growth}}
+    )
+    assert abs(scenarios['base']['accumulated_capital'] - capital) <= 0.01
+    assert abs(scenarios['explicit']['accumulated_capital'] - expected['accumulated_capital']) <= 0.01
+
+
+def test_life_table_lookup(tmp_path):
+    """Memory-mapped life tables replace the flat life expectancy"""
+    from models.life_tables import LifeTable, convert_csv
+
+    csv_path = tmp_path / 'life.csv'
+    lines = ['year,sex,age_months,life_expectancy_months']
+    for year in (2040, 2041):
+        for sex, base in (('m', 220.0), ('f', 280.0)):
+            for age_months in range(60 * 12, 70 * 12):
+                lines.append(f'{year},{sex},{age_months},{base - (age_months - 720) * 0.5 - (year - 2040)}')
+    csv_path.write_text('\n'.join(lines))
+    table_path = str(tmp_path / 'life.bin')
+    convert_csv(str(csv_path), table_path)
+
+    table = LifeTable(table_path)
+    assert table.life_expectancy_months(True, 65 * 12, 2040) == 220.0 - 60 * 0.5
+    assert table.life_expectancy_months(False, 60 * 12 + 1, 2041) == 280.0 - 0.5 - 1
+    assert list(table.life_expectancy_months([True, False], [720, 720], [1990, 2100])) == [220.0, 279.0]
+
+    calculator = PensionCalculator()
+    calculator.minimum_pension = 0
+    calculator.life_table = table
+    now = calculator.current_year
+    person = {'age': 65 - (2040 - now), 'sex': 'm', 'gross_salary': 5000,
+              'work_start_year': 2010, 'work_end_year': 2040}
+    result = calculator.calculate_pension(person)
+    assert abs(result['actual_amount'] - round(result['accumulated_capital'] / 190.0, 2)) <= 0.01
+    batch = calculator.calculate_pension_batch(pd.DataFrame([person]))
+    assert abs(batch['actual_amount'][0] - result['actual_amount']) <= 0.01
+
+
+def test_target_pension_solver():
+    """Solved salary and retirement year reach the target pension"""
+    calculator = PensionCalculator()
+    people = pd.DataFrame([
+        {'age': 30, 'sex': 'm', 'gross_salary': 20000, 'work_start_year': 2018, 'target_amount': 2000},
+        {'age': 40, 'sex': 'f', 'gross_salary': 30000, 'work_start_year': 2008, 'work_end_year': 2050,
+         'zus_funds': 50000, 'include_sick_leave': True, 'target_amount': 2500},
+    ])
+
+    records = [{k: v for k, v in row.items() if not pd.isna(v)} for row in people.to_dict('records')]
+
+    salaries = calculator.solve_required_salary(people)
+    for i, person in enumerate(records):
+        solved = dict(person, gross_salary=salaries[i])
+        assert abs(calculator.calculate_pension(solved)['actual_amount'] - person['target_amount']) <= 0.01
+
+    years = calculator.solve_retirement_year(people)
+    for i, person in enumerate(records):
+        year = int(years[i])
+        reached = calculator.calculate_pension(dict(person, work_end_year=year))['actual_amount']
+        before = calculator.calculate_pension(dict(person, work_end_year=year - 1))
+        assert reached >= person['target_amount']
+        assert 'error' in before or before['actual_amount'] < person['target_amount']
+
+    unreachable = calculator.solve_target_pension(
+        {'age': 30, 'sex': 'm', 'gross_salary': 3000, 'work_start_year': 2018}, 1e6
+    )
+    assert unreachable['required_work_end_year'] is None
+
+
+def test_deferral_curve_matches_deferral_benefits():
+    """Monthly deferral curve passes through the yearly deferral benefits"""
+    calculator = PensionCalculator()
+    person = {'age': 35, 'sex': 'f', 'gross_salary': 9000, 'work_start_year': 2012, 'zus_funds': 80000}
+
+    curve = calculator.calculate_deferral_curve(person)
+    points = {point['months']: point for point in curve['curve']}
+    assert sorted(points) == list(range(1, calculator.max_deferral_months + 1))
+
+    amounts = [point['actual_amount'] for point in curve['curve']]
+    assert all(a <= b for a, b in zip(amounts, amounts[1:]))
+
+    benefits = calculator.calculate_pension(person)['deferral_benefits']
+    for years in calculator.deferral_horizons:
+        for field in ['actual_amount', 'real_amount', 'increase_percentage']:
+            assert points[years * 12][field] == benefits[f'{years}_years'][field]
+
+    assert 'error' in calculator.calculate_deferral_curve(person, [0, 12])
+    assert 'error' in calculator.calculate_deferral_curve(person, [calculator.max_deferral_months + 1])
+
+
+def test_cohort_runner_matches_batch(tmp_path):
+    """Chunked multi-process run writes the batch results in input order"""
+    from cohort_runner import run_cohort
+
+    people = pd.DataFrame({
+        'id': range(10),
+        'age': [30, 45, 50, 28, 61, 35, 40, 33, 55, 47],
+        'sex': ['m', 'f'] * 5,
+        'gross_salary': [5000, 8000, 12000, 4500, 9000, 7000, 6500, 10000, 5500, 7500],
+        'work_start_year': [2015, 2000, 1995, 2020, 1988, 2012, 2005, 2014, 1992, 2003],
+    })
+    input_path = tmp_path / 'population.csv'
+    output_path = tmp_path / 'results.csv'
+    people.to_csv(input_path, index=False)
+
+    rows = run_cohort(str(input_path), str(output_path), workers=2, chunk_size=3,
+                      parameters={'retirement_age_men': 67})
+    assert rows == len(people)
+
+    output = pd.read_csv(output_path)
+    expected = PensionCalculator().calculate_pension_batch(people, {'retirement_age_men': 67})
+    assert list(output['id']) == list(people['id'])
+    np.testing.assert_allclose(output['actual_amount'], expected['actual_amount'])
+    np.testing.assert_array_equal(output['retirement_year'], expected['retirement_year'])
+
+
+def test_cohort_runner_parquet_chunks_share_schema(tmp_path):
+    """Chunks whose columns infer different dtypes are written to one Parquet schema"""
+    pytest.importorskip('pyarrow')
+    from cohort_runner import run_cohort
+
+    # The first chunk has whole-number salaries and no notes; the second has NaN and text
+    people = pd.DataFrame({
+        'id': range(4),
+        'age': [30, 45, 50, 28],
+        'sex': ['m', 'f', 'm', 'f'],
+        'gross_salary': [5000, 8000, 12000.5, 4500],
+        'work_start_year': [2015, 2000, 1995, 2020],
+        'notes': [None, None, 'part-time', None],
+        'bonus': [100, 200, None, 50],
+    })
+    input_path = tmp_path / 'population.csv'
+    output_path = tmp_path / 'results.parquet'
+    people.to_csv(input_path, index=False)
+
+    rows = run_cohort(str(input_path), str(output_path), workers=1, chunk_size=2)
+    assert rows == len(people)
+
+    output = pd.read_parquet(output_path)
+    assert list(output['id']) == list(people['id'])
+    assert output['notes'].iloc[2] == 'part-time'
+    assert output['gross_salary'].iloc[2] == 12000.5
+
+
+def test_liability_forecast_matches_per_person_projection():
+    """Cohort forecast equals summing each person's contributions and pension payments"""
+    calculator = PensionCalculator()
+    people = pd.DataFrame([
+        {'age': 63, 'sex': 'm', 'gross_salary': 9000, 'work_start_year': 1990},
+        {'age': 58, 'sex': 'f', 'gross_salary': 12000, 'work_start_year': 1992, 'include_sick_leave': True},
+        {'age': 40, 'sex': 'm', 'gross_salary': 6000, 'work_start_year': 2008, 'zus_funds': 40000},
+    ] * 2)
+    first_year = calculator.current_year
+    forecast = calculator.forecast_liabilities(people, first_year, first_year + 30)
+    assert forecast['population'] == 6 and forecast['cohorts'] == 3
+
+    outlay = np.zeros(31)
+    inflow = np.zeros(31)
+    for person in people.to_dict('records'):
+        person = {k: v for k, v in person.items() if not pd.isna(v)}
+        result = calculator.calculate_pension(person)
+        for item in result['capital_accumulation_projection']:
+            if first_year <= item['year'] <= first_year + 30:
+                inflow[item['year'] - first_year] += item['annual_contribution']
+
+        retirement_year = result['retirement_year']
+        life_years = (calculator.life_expectancy_men if person['sex'] == 'm' else calculator.life_expectancy_women)
+        for i in range(31):
+            year = first_year + i
+            share = min(max(retirement_year + life_years - year, 0), 1) if year >= retirement_year else 0
+            outlay[i] += 12 * result['actual_amount'] * (1 + calculator.pension_indexation) ** (year - retirement_year) * share
+
+    np.testing.assert_allclose(forecast['contribution_inflow']['total'], inflow, rtol=1e-6, atol=0.1)
+    np.testing.assert_allclose(forecast['pension_outlay']['total'], outlay, rtol=1e-6, atol=0.1)
+    assert forecast['contributors']['men'][0] + forecast['contributors']['women'][0] == forecast['contributors']['total'][0]
+
+    cohorts = calculator.aggregate_cohorts(people)
+    merged = calculator.aggregate_cohorts(pd.concat([cohorts, cohorts]))
+    assert merged['count'].sum() == 12 and len(merged) == len(cohorts)
+
+
+def test_calculation_session_matches_full_recalculation():
+    """Edits through a session give the same result as recalculating from scratch"""
+    from models.calculation_session import CalculationSession
+
+    calculator = PensionCalculator()
+    person = {'age': 38, 'sex': 'f', 'gross_salary': 8500, 'work_start_year': 2010, 'zus_funds': 60000}
+    session = CalculationSession(person, calculator)
+
+    edits = [
+        {'work_end_year': 2060},
+        {'work_end_year': 2048},
+        {'zus_funds': 90000},
+        {'gross_salary': 11000, 'include_sick_leave': True},
+        {'work_end_year': None},
+        {'work_start_year': 2012},
+    ]
+    for edit in edits:
+        person.update(edit)
+        result = session.update(edit)
+        expected = calculator.calculate_pension(dict(person))
+        for field in ['actual_amount', 'real_amount', 'accumulated_capital', 'retirement_year', 'deferral_benefits']:
+            assert result[field] == expected[field]
+        assert len(result['capital_accumulation_projection']) == len(expected['capital_accumulation_projection'])
+
+    assert session.factor_rebuilds == 2
+    assert session.update({'work_end_year': 2020})['error'] == calculator.calculate_pension(dict(person, work_end_year=2020))['error']
+
+    # Unknown fields and invalid values are rejected without changing the session input
+    before = dict(session.input_data)
+    assert 'Unknown input field: salary' in session.update({'salary': 1})['error']
+    assert 'error' in session.update({'sex': 'x'})
+    assert session.input_data == before
+
+
+def test_pension_records():
+    """Frontend input converts once to a hashable record and results serialize from it"""
+
+    pension_input = PensionInput.from_frontend({
+        'age': '40', 'gender': 'female', 'grossSalary': 9000, 'workStartYear': 2008,
+        'workEndYear': '', 'currentFunds': 50000, 'expectedPension': 0, 'postalCode': '00-001'
+    })
+    assert pension_input == PensionInput.from_mapping({
+        'age': 40, 'sex': 'F', 'gross_salary': 9000.0, 'work_start_year': 2008, 'zus_funds': 50000
+    })
+    assert hash(pension_input) == hash(pension_input.replace(postal_code=None))
+    assert pension_input.expected_pension is None
+
+    with pytest.raises(ValueError, match='Missing required field: gross_salary'):
+        PensionInput.from_frontend({'age': 40, 'gender': 'male', 'workStartYear': 2008})
+    with pytest.raises(ValueError, match='Invalid data format'):
+        PensionInput.from_frontend({'age': 40, 'gender': 'male', 'grossSalary': 'abc', 'workStartYear': 2008})
+
+    result = PensionCalculator().calculate(pension_input)
+    as_dict = result.to_dict()
+    frontend = result.to_frontend_dict()
+    assert frontend['real_amount'] == as_dict['actual_amount']
+    assert frontend['inflation_adjusted_amount'] == as_dict['real_amount']
+    assert frontend['delayed_retirement_scenarios']['two_years']['amount'] == as_dict['deferral_benefits']['2_years']['actual_amount']
+    assert frontend['funds_growth_timeline'] == as_dict['capital_accumulation_projection']
+
+
+def test_salary_history_analysis_and_capital():
+    """Salary histories replace the flat salary for the years they cover"""
+    from models.salary_history import SalaryHistory
+
+    calculator = PensionCalculator()
+    start_year = calculator.current_year - 15
+    salary, end_year = 6000.0, calculator.current_year + 20
+    flat = calculator._calculate_accumulated_capital(salary, start_year, end_year, 10000, False, 'f')
+
+    # A constant nominal history is exactly the flat-salary assumption
+    annual = SalaryHistory([salary] * 15, start_year)
+    monthly = SalaryHistory([salary] * 180, start_year, 'monthly')
+    for history in [annual, monthly]:
+        with_history = calculator._calculate_accumulated_capital(salary, start_year, end_year, 10000, False, 'f', history)
+        assert abs(with_history - flat) < 1e-6 * flat
+
+    # Two years without contributions remove exactly their indexed contributions
+    values = np.full(180, salary)
+    values[24:48] = 0
+    gap_history = SalaryHistory(values, start_year, 'monthly')
+    gap_years = np.array([start_year + 2, start_year + 3])
+    missing = salary * calculator.contribution_rate * calculator._indexation_to_current(gap_years).sum()
+    with_gaps = calculator._calculate_accumulated_capital(salary, start_year, end_year, 10000, False, 'f', gap_history)
+    assert abs(flat - with_gaps - missing) < 1e-6 * flat
+    assert gap_history.gaps() == [{'start': f'{start_year + 2}-01', 'end': f'{start_year + 3}-12', 'months': 24}]
+
+    # Steady 5% yearly raises, paid monthly
+    growing = SalaryHistory(4000 * 1.05 ** (np.arange(480) / 12), 1985, 'monthly')
+    assert abs(growing.growth_rate() - 0.05) < 1e-9
+    assert growing.volatility() < 1e-9
+
+    person = {'age': 45, 'sex': 'f', 'gross_salary': salary, 'work_start_year': start_year,
+              'historical_salaries': {'frequency': 'monthly', 'start_year': start_year, 'values': values.tolist()}}
+    analysis = calculator.get_advanced_analysis(person, {'unchanged': {}, 'later_end': {'work_end_year': 2060}})
+    assert analysis['historical_analysis']['gap_months'] == 24
+    assert analysis['base_results']['accumulated_capital'] < calculator.calculate_pension(person)['accumulated_capital']
+    assert analysis['capital_accumulation_projection'][-1]['total_funds'] == analysis['base_results']['accumulated_capital']
+
+    # Every scenario uses the same salary history as the base results
+    history = SalaryHistory.from_input(person['historical_salaries'], start_year)
+    scenarios = analysis['scenarios']
+    assert scenarios['unchanged'] == analysis['base_results']
+    later = calculator.calculate(PensionInput.from_mapping(dict(person, work_end_year=2060)), history)
+    assert scenarios['later_end']['accumulated_capital'] == later.accumulated_capital
+    assert scenarios['with_sick_leave']['accumulated_capital'] < analysis['base_results']['accumulated_capital']
+    assert (scenarios['lower_salary_growth']['accumulated_capital'] < analysis['base_results']['accumulated_capital']
+            < scenarios['higher_salary_growth']['accumulated_capital'])
@@ -80,5 +80,152 @@ def test_database():
     db.close()
 
 
+def test_bulk_create(tmp_path):
+    """Bulk insert returns the IDs of the new rows in order"""
+    db = DatabaseFactory.create_repository('sqlite', db_path=str(tmp_path / 'bulk.db'))
+    first_id = db.create_simulation({'age': 30})
+
+    records = [
+        {'input_data': {'age': 30 + i}, 'results': {'actual_amount': 1000 + i}, 'status': 'completed'}
+        for i in range(5)
+    ]
+    records.append({'input_data': {'age': 99}})
+    ids = db.create_simulations_bulk(records)
+
+    assert ids == list(range(first_id + 1, first_id + 7))
+    assert db.get_simulation(ids[2])['results'] == {'actual_amount': 1002}
+    assert db.get_simulation(ids[-1])['status'] == 'processing'
+    assert db.create_simulations_bulk([]) == []
+    assert db.get_simulation_count() == 7
+
+
+def test_bulk_chunks_and_updates(tmp_path):
+    """Chunked bulk insert of a generator, bulk update, and all-or-nothing on failure"""
+    import pytest
+
+    db = DatabaseFactory.create_repository('sqlite', db_path=str(tmp_path / 'bulk_update.db'))
+    ids = db.create_simulations_bulk(({'input_data': {'age': 20 + i}} for i in range(7)), chunk_size=3)
+    assert ids == list(range(ids[0], ids[0] + 7))
+
+    updated = db.update_simulations_bulk(
+        ({'id': simulation_id, 'results': {'actual_amount': float(i)}} for i, simulation_id in enumerate(ids)),
+        chunk_size=2
+    )
+    assert updated == 7
+    assert db.get_simulation(ids[4])['results'] == {'actual_amount': 4.0}
+    assert db.get_simulation(ids[4])['status'] == 'completed'
+    assert db.update_simulations_bulk([{'id': ids[-1] + 100, 'results': {}}]) == 0
+
+    def broken():
+        yield {'input_data': {'age': 1}}
+        raise ValueError('bad record')
+
+    with pytest.raises(ValueError):
+        db.create_simulations_bulk(broken(), chunk_size=1)
+    assert db.get_simulation_count() == 7
+    # The failing generator raised before anything was queued for the writer
+    assert db.pool_stats()['writer']['operations'] == 3
+    db.close()
+
+
+def test_connection_pool(tmp_path):
+    """Operations reuse a few WAL connections from many threads; close() closes them"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    db = DatabaseFactory.create_repository('sqlite', db_path=str(tmp_path / 'pool.db'), pool_size=3)
+
+    def work(i):
+        simulation_id = db.create_simulation({'age': i})
+        db.update_simulation(simulation_id, {'actual_amount': i})
+        return db.get_simulation(simulation_id)['results']['actual_amount']
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(work, range(40))) == list(range(40))
+
+    stats = db.pool_stats()
+    assert stats['journal_mode'] == 'wal'
+    # Reads check out a connection each; writes share one per group commit
+    assert stats['created'] <= 3 and stats['checkouts'] >= 40
+    assert db.get_statistics()['total_simulations'] == 40
+
+    db.close()
+    assert db.pool_stats()['open'] == 0
+
+
+def test_writer_group_commit(tmp_path):
+    """Writes queued behind a running transaction are committed together; a failing write only fails itself"""
+    import threading
+    import pytest
+
+    db = DatabaseFactory.create_repository('sqlite', db_path=str(tmp_path / 'writer.db'))
+    started, release = threading.Event(), threading.Event()
+
+    def blocker(cursor):
+        started.set()
+        release.wait(5)
+
+    def failing(cursor):
+        cursor.execute('INSERT INTO simulations (id) VALUES (NULL)')
+
+    db.writer.submit(blocker)
+    started.wait(5)
+    futures = [db.create_simulation_async({'age': i}) for i in range(50)]
+    bad = db.writer.submit(failing)
+    bulk = db.create_simulations_bulk_async([{'input_data': {'age': 99}}] * 3)
+    release.set()
+
+    ids = [future.result(5) for future in futures]
+    assert ids == list(range(ids[0], ids[0] + 50))
+    assert bulk.result(5) == [ids[-1] + 1, ids[-1] + 2, ids[-1] + 3]
+    with pytest.raises(Exception):
+        bad.result(5)
+    assert db.update_simulation_async(ids[0], {'actual_amount': 1}).result(5) is True
+
+    writer = db.pool_stats()['writer']
+    assert writer['largest_batch'] == 52
+    assert db.get_simulation_count() == 53
+    db.close()
+
+
+def test_write_behind(tmp_path):
+    """Queued records are stored in group commits, overflow is written synchronously, close() flushes"""
+    import threading
+    from database.write_behind import SimulationWriter
+
+    db = DatabaseFactory.create_repository('sqlite', db_path=str(tmp_path / 'write_behind.db'))
+    writing, release = threading.Event(), threading.Event()
+    calls = []
+
+    class SlowRepository:
+        def create_simulations_bulk(self, records):
+            calls.append(len(records))
+            writing.set()
+            release.wait(5)
+            return db.create_simulations_bulk(records)
+
+    repository = SlowRepository()
+    writer = SimulationWriter(lambda: repository, max_queue=3, batch_size=10, put_timeout=0.01)
+    record = {'input_data': {'age': 30}, 'results': {'actual_amount': 1000.0}, 'status': 'completed'}
+
+    writer.submit(record)
+    assert writing.wait(5)
+    # The first batch is blocked; three records fill the queue, the fourth is written by the caller
+    for _ in range(3):
+        writer.submit(record)
+    threading.Timer(0.1, release.set).start()
+    writer.submit(record)
+    writer.close()
+
+    assert db.get_simulation_count() == 5
+    assert writer.stats()['synchronous_writes'] == 1
+    assert sorted(calls) == [1, 1, 3]
+
+    # After close() records are written directly; records that cannot be stored are counted
+    writer.submit(record)
+    writer.submit({'results': {}})
+    assert db.get_simulation_count() == 6
+    assert writer.stats()['failed'] == 1
+
+
 if __name__ == '__main__':
     test_database()
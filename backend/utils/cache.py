@@ -0,0 +1,171 @@
+"""
+In-process LRU/TTL cache for calculation results
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with an optional time-to-live"""
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = None, sliding: bool = False):
+        """
+        Initialize the cache
+
+        Args:
+            maxsize: Maximum number of entries kept before evicting the least recently used
+            ttl: Entry lifetime in seconds (None keeps entries until evicted)
+            sliding: Restart the lifetime on every hit instead of only on set
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sliding = sliding
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Look up a key
+
+        Returns:
+            (True, value) on a hit, (False, None) on a miss or an expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expires_at, value = entry
+            now = time.monotonic()
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+
+            if self.sliding and expires_at is not None:
+                self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries if full"""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'sliding': self.sliding,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class _Call:
+    """One in-flight computation and its outcome"""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one computation
+
+    The first caller for a key runs the function; callers arriving while it runs
+    wait and receive the same value (or exception). Nothing is kept afterwards,
+    so this complements LRUCache rather than replacing it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn() unless an identical call is in flight, in which case wait for its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'leaders': self.leaders,
+                'shared': self.shared
+            }
+
+
+def _ttl_from_env() -> Optional[float]:
+    ttl = os.environ.get('RESULT_CACHE_TTL')
+    return float(ttl) if ttl else None
+
+
+# Shared cache for PensionCalculator results across requests
+result_cache = LRUCache(
+    maxsize=int(os.environ.get('RESULT_CACHE_SIZE', 4096)),
+    ttl=_ttl_from_env()
+)
+
+# Shared by all calculator entry points, so identical concurrent requests run once
+in_flight = SingleFlight()
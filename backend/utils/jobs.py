@@ -0,0 +1,177 @@
+"""
+In-process background jobs for heavy requests (advanced analysis, PDF reports)
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+
+class JobQueueFull(Exception):
+    """Too many jobs are queued or running"""
+
+
+@dataclass
+class Job:
+    """State of one background job"""
+
+    id: str
+    kind: str
+    status: str = 'queued'
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Any = None
+    error: Optional[str] = None
+    cleanup: Optional[Callable[[Any], None]] = field(default=None, repr=False)
+    finished: Optional[float] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Job status as returned by the API"""
+        status = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.error:
+            status['error'] = self.error
+        return status
+
+
+class JobQueue:
+    """
+    Bounded thread pool running jobs, with status and results kept for result_ttl seconds
+
+    At most max_finished finished jobs are kept; beyond that the oldest are dropped
+    early, so sustained traffic cannot hold an unbounded number of results.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 100, result_ttl: float = 3600,
+                 max_finished: int = 1000):
+        """
+        Initialize the queue
+
+        Args:
+            max_workers: Jobs running at the same time
+            max_pending: Queued and running jobs accepted before submit raises JobQueueFull
+            result_ttl: Seconds a finished job (and its result) is kept
+            max_finished: Finished jobs kept at most
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: Dict[str, Job] = {}
+        # IDs of finished jobs, oldest first
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def submit(self, kind: str, fn: Callable, *args, cleanup: Optional[Callable[[Any], None]] = None) -> Job:
+        """
+        Queue fn(*args) as a job
+
+        Args:
+            kind: Job type shown in the status (e.g. 'advanced_analysis')
+            fn: Work to run in the pool; its return value is the job result
+            cleanup: Optional callback receiving the result when the job expires
+
+        Raises:
+            JobQueueFull: max_pending jobs are already queued or running
+        """
+        with self._lock:
+            self._expire()
+            pending = len(self._jobs) - len(self._finished)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f'Job queue is full ({self.max_pending} jobs pending)')
+            job = Job(id=uuid.uuid4().hex, kind=kind, cleanup=cleanup)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID (None if unknown or expired)"""
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status and the queue limits"""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            'jobs': counts,
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'result_ttl': self.result_ttl,
+            'max_finished': self.max_finished,
+            'evicted': self.evicted
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and optionally wait for running jobs"""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable, args):
+        job.status = 'running'
+        job.started_at = datetime.utcnow().isoformat()
+        try:
+            job.result = fn(*args)
+            job.status = 'completed'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = datetime.utcnow().isoformat()
+            with self._lock:
+                job.finished = time.monotonic()
+                self._finished[job.id] = None
+                while len(self._finished) > self.max_finished:
+                    self._drop(self._finished.popitem(last=False)[0])
+                    self.evicted += 1
+
+    def _expire(self):
+        """Drop finished jobs older than result_ttl (caller holds the lock)"""
+        now = time.monotonic()
+        # Jobs are in finishing order, so the expired ones are at the front
+        while self._finished:
+            job_id = next(iter(self._finished))
+            if now - self._jobs[job_id].finished <= self.result_ttl:
+                break
+            del self._finished[job_id]
+            self._drop(job_id)
+
+    def _drop(self, job_id: str):
+        """Forget a finished job and release its result (caller holds the lock)"""
+        job = self._jobs.pop(job_id)
+        if job.cleanup and job.result is not None:
+            try:
+                job.cleanup(job.result)
+            except Exception as e:
+                print(f"⚠️ Job cleanup error: {str(e)}")
+
+
+# Shared queue for the API (JOB_WORKERS limits concurrency)
+job_queue = JobQueue(
+    max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+    max_pending=int(os.environ.get('JOB_MAX_PENDING', 100)),
+    result_ttl=float(os.environ.get('JOB_RESULT_TTL', 3600)),
+    max_finished=int(os.environ.get('JOB_MAX_FINISHED', 1000))
+)
@@ -0,0 +1,235 @@
+"""
+In-process metrics (counters and histograms) exposed in Prometheus text format
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ContextDecorator
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import Response, g, request
+
+# Seconds; covers cached lookups (sub-millisecond) up to report generation
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Bytes
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label combination"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(name, '') for name in self.labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labels, key)} {_format_number(value)}' for key, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels) -> 'Timer':
+        """Context manager / decorator observing the elapsed seconds"""
+        return Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels.get(name, '') for name in self.labels))
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+
+        lines = []
+        bounds = [_format_number(float(bound)) for bound in self.buckets] + ['+Inf']
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = 'le="' + bound + '"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {_format_number(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {count}')
+        return lines
+
+
+class Timer(ContextDecorator):
+    """Observes elapsed wall-clock seconds into a histogram"""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self._started = None
+
+    def _recreate_cm(self):
+        # A fresh timer per decorated call, so concurrent calls do not share a start time
+        return Timer(self.histogram, self.labels)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Named metrics rendered together for the /metrics endpoint"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    'http_requests_total', 'HTTP requests by route, method and status', ('method', 'route', 'status'))
+http_request_duration = metrics.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route'))
+http_request_size = metrics.histogram(
+    'http_request_size_bytes', 'HTTP request body size by route', ('route',), SIZE_BUCKETS)
+http_response_size = metrics.histogram(
+    'http_response_size_bytes', 'HTTP response body size by route (streamed responses excluded)', ('route',), SIZE_BUCKETS)
+calculator_duration = metrics.histogram(
+    'calculator_duration_seconds', 'PensionCalculator time by operation', ('operation',))
+db_duration = metrics.histogram(
+    'db_operation_duration_seconds', 'Repository time by method', ('method',))
+batch_rows = metrics.counter(
+    'batch_rows_total', 'Rows processed by batch paths', ('path', 'outcome'))
+batch_chunk_duration = metrics.histogram(
+    'batch_chunk_duration_seconds', 'Time per calculated and persisted batch chunk', ('path',))
+
+
+def timed_calculation(operation: str):
+    """Decorator recording a calculator method's time under the given operation label"""
+    return calculator_duration.time(operation=operation)
+
+
+def instrument_methods(obj, names: Iterable[str], histogram: Histogram = db_duration, label: str = 'method'):
+    """Wrap the named methods of one instance so each call is timed into histogram"""
+    for name in names:
+        method = getattr(obj, name, None)
+        if method is None:
+            continue
+        setattr(obj, name, histogram.time(**{label: name})(method))
+    return obj
+
+
+def _route_label() -> str:
+    return request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+
+
+def init_metrics(app, endpoint: Optional[str] = '/metrics'):
+    """
+    Record request metrics for every request of app and serve them at endpoint
+
+    Args:
+        app: Flask application
+        endpoint: URL of the Prometheus endpoint (None to not register one)
+    """
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        route = _route_label()
+        http_requests.inc(method=request.method, route=route, status=response.status_code)
+        http_request_duration.observe(time.perf_counter() - started, method=request.method, route=route)
+        if request.content_length:
+            http_request_size.observe(request.content_length, route=route)
+        if not response.is_streamed and response.content_length is not None:
+            http_response_size.observe(response.content_length, route=route)
+        return response
+
+    if endpoint:
+        @app.route(endpoint, methods=['GET'])
+        def prometheus_metrics():
+            """Metrics in Prometheus text format"""
+            return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    return app
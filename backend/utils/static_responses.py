@@ -0,0 +1,91 @@
+"""
+Pre-serialized JSON responses for static data endpoints
+"""
+
+import hashlib
+import json
+import random
+from datetime import datetime
+
+from flask import Response, request
+
+
+def encode_json(data) -> bytes:
+    """Encode data exactly like jsonify does outside debug mode"""
+    return (json.dumps(data, ensure_ascii=True, sort_keys=True, separators=(',', ':')) + '\n').encode('ascii')
+
+
+class StaticJSON:
+    """
+    JSON body encoded once, served with a strong ETag and Cache-Control
+
+    Requests whose If-None-Match matches the ETag get an empty 304.
+    Call update() when the underlying data changes.
+    """
+
+    def __init__(self, data, max_age: int = 3600):
+        """
+        Encode the response
+
+        Args:
+            data: JSON-serializable response data
+            max_age: Seconds clients may reuse the response without revalidating
+        """
+        self.cache_control = f'public, max-age={max_age}'
+        self.update(data)
+
+    def update(self, data):
+        """Re-encode the response (and its ETag) for new data"""
+        body = encode_json(data)
+        # Body and ETag are swapped in together so concurrent requests never mix them
+        self._encoded = (body, hashlib.sha256(body).hexdigest()[:32])
+
+    @property
+    def etag(self) -> str:
+        return self._encoded[1]
+
+    def response(self) -> Response:
+        """The cached response, or 304 if the client already has it"""
+        body, etag = self._encoded
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = self.cache_control
+        return response
+
+
+class RandomFactTable:
+    """
+    Facts pre-encoded as {"fact": ..., "timestamp": ...} bodies
+
+    Each body is stored up to the timestamp value, so a request only picks an
+    index and appends the current time.
+    """
+
+    def __init__(self, facts):
+        self.update(facts)
+
+    def update(self, facts):
+        """Re-encode the table for a new list of facts"""
+        prefixes = []
+        for fact in facts:
+            # sort_keys puts "fact" before "timestamp", so the timestamp value closes the body
+            encoded = encode_json({'fact': fact, 'timestamp': ''})
+            prefixes.append(encoded[:-len(b'"}\n')])
+        self._prefixes = tuple(prefixes)
+
+    def __len__(self):
+        return len(self._prefixes)
+
+    def response(self, index=None) -> Response:
+        """A random fact (or the one at index) with the current timestamp"""
+        prefixes = self._prefixes
+        if index is None:
+            index = random.randrange(len(prefixes))
+        body = prefixes[index] + datetime.now().isoformat().encode('ascii') + b'"}\n'
+        response = Response(body, mimetype='application/json')
+        # Every response differs, so it must not be cached
+        response.headers['Cache-Control'] = 'no-store'
+        return response